@@ -0,0 +1,277 @@
+import os
+import json
+import time
+import datetime
+from collections import deque
+import numpy as np
+from sample_source import open_source
+from imu_archive import write_archive
+from test_6 import IMUDataLogger
+
+
+class ThresholdTrigger:
+    def __init__(self, level, channels=None):
+        """
+        Fire when |value| reaches level on any of the given channels
+
+        Args:
+            level (float): Absolute threshold in raw sensor units
+            channels (list): Channel indices to watch, all six if None
+        """
+        self.level = level
+        self.channels = slice(None) if channels is None else list(channels)
+
+    def __call__(self, batch):
+        """Return the index of the first triggering sample in batch, or None"""
+        hits = np.flatnonzero((np.abs(batch[:, self.channels]) >= self.level).any(axis=1))
+        return int(hits[0]) if hits.size else None
+
+    def describe(self):
+        return {'type': 'threshold', 'level': self.level,
+                'channels': None if isinstance(self.channels, slice) else self.channels}
+
+
+class BandEnergyTrigger:
+    def __init__(self, band, threshold, sampling_rate=100, channels=None):
+        """
+        Fire when the batch's spectral energy inside band reaches threshold
+
+        Args:
+            band (tuple): (low, high) frequency band in Hz
+            threshold (float): Mean power per sample inside the band
+            sampling_rate (float): Sampling rate in Hz
+            channels (list): Channel indices summed together, all six if None
+        """
+        self.band = band
+        self.threshold = threshold
+        self.sampling_rate = sampling_rate
+        self.channels = slice(None) if channels is None else list(channels)
+        self.masks = {}
+
+    def __call__(self, batch):
+        n = len(batch)
+        if n not in self.masks:
+            freqs = np.fft.rfftfreq(n, 1.0 / self.sampling_rate)
+            self.masks[n] = (freqs >= self.band[0]) & (freqs <= self.band[1])
+        signals = batch[:, self.channels]
+        spectrum = np.fft.rfft(signals - signals.mean(axis=0), axis=0)[self.masks[n]]
+        energy = np.sum(spectrum.real ** 2 + spectrum.imag ** 2) / (n * n)
+        return 0 if energy >= self.threshold else None
+
+    def describe(self):
+        return {'type': 'band_energy', 'band': list(self.band), 'threshold': self.threshold,
+                'channels': None if isinstance(self.channels, slice) else self.channels}
+
+
+class IMUEventLogger(IMUDataLogger):
+    def __init__(self, port='/dev/ttyUSB0', baud_rate=115200, duration=None, triggers=(),
+                 pre_trigger=2.0, post_trigger=3.0, sampling_rate=100, batch_size=10,
+                 folder_path='events', max_total_bytes=500 * 2**20):
+        """
+        Event-capture mode: keep a rolling pre-trigger buffer and only save
+        the windows around triggered events
+
+        Args:
+            port (str): Serial port, a serial_broker address or a recording to replay
+            baud_rate (int): Baud rate
+            duration (float): Run time in seconds, None to run until interrupted
+            triggers (list): Callables taking a (n, 6) batch and returning the
+                index of the triggering sample or None
+            pre_trigger (float): Seconds kept before the trigger
+            post_trigger (float): Seconds recorded after the trigger
+            sampling_rate (float): Expected sampling rate, sizes the buffers
+            batch_size (int): Samples per trigger evaluation
+            folder_path (str): Folder for event archives and events.jsonl
+            max_total_bytes (int): Oldest events are deleted beyond this size
+        """
+        super().__init__(port, baud_rate, duration)
+        self.triggers = list(triggers)
+        self.batch_size = batch_size
+        self.folder_path = folder_path
+        self.max_total_bytes = max_total_bytes
+
+        # Fixed-size buffers: memory does not grow however long we run
+        self.pre_samples = max(1, int(pre_trigger * sampling_rate))
+        self.post_samples = max(1, int(post_trigger * sampling_rate))
+        self.ring_times = np.zeros(self.pre_samples)
+        self.ring_values = np.zeros((self.pre_samples, 6))
+        self.ring_head = 0
+        self.ring_fill = 0
+        self.post_times = np.zeros(self.post_samples)
+        self.post_values = np.zeros((self.post_samples, 6))
+        self.post_fill = 0
+        self.capturing = None
+
+        os.makedirs(folder_path, exist_ok=True)
+        self.saved = deque(
+            (entry.path, entry.stat().st_size)
+            for entry in sorted(os.scandir(folder_path), key=lambda e: e.name)
+            if entry.name.startswith('event_') and entry.name.endswith('.imuz'))
+        self.saved_bytes = sum(size for _, size in self.saved)
+        self.event_count = 0
+
+    def _push_ring(self, times, values):
+        times, values = times[-self.pre_samples:], values[-self.pre_samples:]
+        index = (self.ring_head + np.arange(len(times))) % self.pre_samples
+        self.ring_times[index] = times
+        self.ring_values[index] = values
+        self.ring_head = (self.ring_head + len(times)) % self.pre_samples
+        self.ring_fill = min(self.ring_fill + len(times), self.pre_samples)
+
+    def _pre_window(self):
+        index = (self.ring_head - self.ring_fill + np.arange(self.ring_fill)) % self.pre_samples
+        return self.ring_times[index], self.ring_values[index]
+
+    def _push_post(self, times, values):
+        take = min(len(times), self.post_samples - self.post_fill)
+        self.post_times[self.post_fill:self.post_fill + take] = times[:take]
+        self.post_values[self.post_fill:self.post_fill + take] = values[:take]
+        self.post_fill += take
+        return take
+
+    def process_batch(self, times, values):
+        """Evaluate triggers on one batch and advance the capture state"""
+        start = 0
+        if self.capturing is not None:
+            start = self._push_post(times, values)
+            self.capturing['retriggers'] += sum(
+                trigger(values[:start]) is not None for trigger in self.triggers)
+            # The ring always holds the latest samples, so an event right
+            # after this one still gets its pre-trigger context
+            self._push_ring(times[:start], values[:start])
+            if self.post_fill < self.post_samples:
+                return
+            self._save_event()
+
+        times, values = times[start:], values[start:]
+        if not len(times):
+            return
+        hits = [(index, trigger) for trigger in self.triggers
+                for index in [trigger(values)] if index is not None]
+        if not hits:
+            self._push_ring(times, values)
+            return
+
+        index, trigger = min(hits, key=lambda hit: hit[0])
+        self._push_ring(times[:index], values[:index])
+        pre_times, pre_values = self._pre_window()
+        self.capturing = {
+            'pre_times': pre_times,
+            'pre_values': pre_values,
+            'trigger_time': float(times[index]),
+            'trigger': trigger.describe(),
+            'retriggers': 0,
+        }
+        self.post_fill = 0
+        taken = self._push_post(times[index:], values[index:])
+        self._push_ring(times[index:index + taken], values[index:index + taken])
+        if self.post_fill == self.post_samples:
+            self._save_event()
+            self.process_batch(times[index + taken:], values[index + taken:])
+
+    def _prune_log(self):
+        """Drop events.jsonl entries whose archives were deleted by the size quota"""
+        log_path = os.path.join(self.folder_path, 'events.jsonl')
+        if not os.path.exists(log_path):
+            return
+        kept = {os.path.basename(filename) for filename, _ in self.saved}
+        with open(log_path) as file:
+            lines = [line for line in file if line.strip() and json.loads(line).get('file') in kept]
+        with open(log_path + '.tmp', 'w') as file:
+            file.writelines(lines)
+        os.replace(log_path + '.tmp', log_path)
+
+    def _save_event(self):
+        event = self.capturing
+        self.capturing = None
+        times = np.concatenate([event['pre_times'], self.post_times[:self.post_fill]])
+        values = np.concatenate([event['pre_values'], self.post_values[:self.post_fill]])
+
+        # Name by wall time: trigger_time is the source's clock, which for a
+        # replayed recording is relative and repeats across recordings
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        filename = os.path.join(self.folder_path, f"event_{stamp}.imuz")
+        suffix = 1
+        while os.path.exists(filename):
+            filename = os.path.join(self.folder_path, f"event_{stamp}_{suffix}.imuz")
+            suffix += 1
+        metadata = {
+            'trigger_time': event['trigger_time'],
+            'trigger': event['trigger'],
+            'retriggers': event['retriggers'],
+            'pre_samples': len(event['pre_times']),
+            'post_samples': self.post_fill,
+        }
+        write_archive(filename, times - times[0], values, self.signal_names,
+                      metadata=dict(metadata, start_time=float(times[0])))
+        with open(os.path.join(self.folder_path, 'events.jsonl'), 'a') as file:
+            file.write(json.dumps(dict(metadata, file=os.path.basename(filename))) + "\n")
+
+        size = os.path.getsize(filename)
+        self.saved.append((filename, size))
+        self.saved_bytes += size
+        removed = False
+        while self.saved_bytes > self.max_total_bytes and len(self.saved) > 1:
+            old_filename, old_size = self.saved.popleft()
+            if os.path.exists(old_filename):
+                os.remove(old_filename)
+            self.saved_bytes -= old_size
+            removed = True
+        if removed:
+            self._prune_log()
+
+        self.event_count += 1
+        print(f"Event {self.event_count} saved to: {filename} "
+              f"({metadata['pre_samples']} + {metadata['post_samples']} samples)")
+
+    def collect_data(self):
+        """Watch the sensor and save triggered events until duration or Ctrl+C"""
+        print(f"Watching for events in {self.port}, saving to {self.folder_path}/")
+        times = np.zeros(self.batch_size)
+        values = np.zeros((self.batch_size, 6))
+        count = 0
+        try:
+            self.ser = open_source(self.port, self.baud_rate)
+            time.sleep(1)  # Wait for connection to stabilize
+
+            start_time = self.ser.clock()
+            while self.duration is None or (self.ser.clock() - start_time) < self.duration:
+                sample = self.read_sensor_data()
+                if sample is None:
+                    if np.isinf(self.ser.clock()):
+                        break  # a replayed recording has run dry
+                    continue
+                times[count] = self.ser.clock()
+                values[count] = sample
+                count += 1
+                if count == self.batch_size:
+                    self.process_batch(times, values)
+                    count = 0
+
+        except KeyboardInterrupt:
+            print("\nEvent capture interrupted by user")
+        finally:
+            # Evaluate the last, partial batch too
+            if count:
+                self.process_batch(times[:count], values[:count])
+            if self.capturing is not None and self.post_fill:
+                self._save_event()
+            self.ser.close()
+        print(f"Captured {self.event_count} events")
+
+def main():
+    logger = IMUEventLogger(
+        port='/dev/ttyUSB0',    # Change this to match your Arduino's port
+        baud_rate=115200,       # Match this with your Arduino's baud rate
+        duration=None,          # Run until interrupted
+        triggers=[
+            ThresholdTrigger(30000, channels=[3, 4, 5]),             # Accelerometer shock
+            BandEnergyTrigger((5, 50), 1e6, sampling_rate=100),      # Vibration burst
+        ],
+        pre_trigger=2.0,        # Seconds kept before each event
+        post_trigger=3.0        # Seconds recorded after each event
+    )
+    logger.collect_data()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import os
+import glob
+import shutil
+import argparse
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # before the views below import pyplot
+from PIL import Image
+from imu_archive import load_recording
+from sample_source import ReplaySource
+import nano_data_v2
+from nano_data_v2 import NanoView
+from test_5 import RealtimeRGBScalogram
+
+
+class BlitFigure:
+    def __init__(self, fig, animated, dpi, cached=()):
+        """
+        Draw a figure's static parts once; each frame only redraws `animated`
+
+        Args:
+            fig: Matplotlib figure on the Agg canvas
+            animated (list): Artists (or whole axes) that change between frames
+            dpi (int): Output resolution
+            cached (list): Artists that change only occasionally; they are kept
+                in a second background layer rebuilt after invalidate()
+        """
+        self.fig = fig
+        self.animated = animated
+        self.cached = list(cached)
+        fig.set_dpi(dpi)
+        for artist in self.animated + self.cached:
+            artist.set_animated(True)
+        self.canvas = fig.canvas
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(fig.bbox)
+        self.layer = None
+
+    def invalidate(self):
+        """Mark the cached artists as changed"""
+        self.layer = None
+
+    def save(self, filename):
+        """Redraw the animated artists and save; .jpg encodes ~5x faster than .png"""
+        if self.layer is None:
+            self.canvas.restore_region(self.background)
+            for artist in self.cached:
+                self.fig.draw_artist(artist)
+            self.layer = self.canvas.copy_from_bbox(self.fig.bbox)
+        else:
+            self.canvas.restore_region(self.layer)
+        for artist in self.animated:
+            self.fig.draw_artist(artist)
+        image = Image.fromarray(np.asarray(self.canvas.buffer_rgba())[:, :, :3])
+        if filename.endswith('.png'):
+            image.save(filename, compress_level=1)
+        else:
+            image.save(filename, quality=95)
+
+
+class RGBFrameRenderer:
+    def __init__(self, path, buffer_size=50, dpi=80):
+        """Render RealtimeRGBScalogram (test_5.py) as it looked after each sample of a recording"""
+        # The view replays the recording itself, so it sees the same int16 samples it would live
+        self.view = RealtimeRGBScalogram(path, buffer_size=buffer_size, speed=None)
+        self.source = self.view.ser
+        view = self.view
+        # Only the sliding time axis of the signal panel changes, its y axis stays in the background
+        self.blit = BlitFigure(view.fig, [view.ax_signals.xaxis] + view.lines + [view.ax_signals.get_legend()],
+                               dpi, cached=view.scalogram_plots + [view.combined_plot])
+
+    @property
+    def frame_count(self):
+        return len(self.source.timestamps)
+
+    def render(self, frame, filename):
+        """Draw the view after sample `frame` arrived and save it"""
+        view = self.view
+        start = max(0, frame - view.buffer_size + 1)
+        for buffer in view.signal_buffers + [view.time_buffer]:
+            buffer.clear()
+        times = self.source.timestamps - view.start_time
+        # Like read_sensor_data, only the last three columns are shown
+        for t, values in zip(times[start:frame + 1].tolist(), self.source.values[start:frame + 1, -3:].tolist()):
+            view.append_sample(t, values)
+        view.update_view()
+        if len(view.signal_buffers[0]) >= view.buffer_size:
+            self.blit.invalidate()
+        self.blit.save(filename)
+
+
+class NanoFrameRenderer:
+    def __init__(self, path, dpi=80):
+        """Render nano_data_v2.py's view as it looked after each sample of a recording"""
+        self.source = ReplaySource(path, speed=None)
+        self.view = NanoView()
+        self.view.fig.tight_layout()
+        self.scalogram_frame = None
+        self.blit = BlitFigure(self.view.fig, self.view.lines, dpi, cached=[self.view.image])
+
+    @property
+    def frame_count(self):
+        return len(self.source.timestamps)
+
+    def render(self, frame, filename):
+        view, values = self.view, self.source.values
+        view.clear()
+        for row in values[max(0, frame - nano_data_v2.maxlen + 1):frame + 1].tolist():
+            view.append_sample(row)
+        view.update_lines()
+
+        # The live script redraws the scalogram on every 50th frame only
+        last = frame - frame % nano_data_v2.scalogram_every
+        if last != self.scalogram_frame:
+            self.scalogram_frame = last
+            view.update_scalogram(values[max(0, last - nano_data_v2.maxlen + 1):last + 1, 3])
+            self.blit.invalidate()
+        self.blit.save(filename)
+
+
+RENDERERS = {'rgb': RGBFrameRenderer, 'nano': NanoFrameRenderer}
+_renderer = None
+
+
+def _init_worker(path, style, dpi):
+    global _renderer
+    _renderer = RENDERERS[style](path, dpi=dpi)
+
+
+def _render_frames(frames, folder, extension):
+    for frame in frames:
+        _renderer.render(frame, os.path.join(folder, f"frame_{frame:06d}{extension}"))
+    return len(frames)
+
+
+def export_animation(path, output, style='rgb', step=1, workers=None, dpi=80, fps=None):
+    """
+    Render the live view of a recorded session headlessly, in parallel
+
+    Args:
+        path (str): Recording (CSV or .imuz)
+        output (str): Folder for a PNG sequence, or a video file (.mp4, .gif, ...)
+        style (str): 'rgb' for RealtimeRGBScalogram, 'nano' for nano_data_v2.py
+        step (int): Render every step-th sample
+        workers (int): Worker processes, one per CPU if None
+        dpi (int): Output resolution
+        fps (float): Video frame rate, real time (sample rate / step) if None
+    """
+    timestamps, _, _ = load_recording(path)
+    frames = np.arange(0, len(timestamps), step)
+    video = os.path.splitext(output)[1] != ''
+    folder = os.path.splitext(output)[0] + '_frames' if video else output
+    os.makedirs(folder, exist_ok=True)
+    # Video frames are only an intermediate for ffmpeg, so trade PNG for fast JPEG
+    extension = '.jpg' if video else '.png'
+
+    workers = workers or os.cpu_count()
+    chunks = [chunk for chunk in np.array_split(frames, workers * 4) if len(chunk)]
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(path, style, dpi)) as pool:
+        done = 0
+        for count in pool.map(_render_frames, chunks, [folder] * len(chunks), [extension] * len(chunks)):
+            done += count
+            print(f"Rendered {done}/{len(frames)} frames", end='\r')
+    elapsed = time.perf_counter() - started
+    duration = timestamps[frames[-1]] - timestamps[0]
+    print(f"\nRendered {len(frames)} frames in {elapsed:.1f} s with {workers} workers "
+          f"({elapsed / len(frames) * workers * 1000:.0f} ms per frame per worker)")
+    # Real time here means covering the recording as fast as it was captured;
+    # with step > 1 only every step-th sample is drawn, so also give the full-rate figure
+    rate = f"{duration / elapsed:.1f}x real time"
+    if step > 1:
+        rate += f" at every {step}th sample, about {duration / (elapsed * step):.1f}x at every sample"
+    print(rate)
+
+    if not video:
+        return folder
+    if shutil.which('ffmpeg') is None:
+        print(f"ffmpeg not found, frames left in {folder}")
+        return folder
+    if fps is None:
+        fps = (len(timestamps) - 1) / (timestamps[-1] - timestamps[0]) / step
+    # Frame numbers are sample indices, so feed them to ffmpeg as a list
+    listing = os.path.join(folder, 'frames.txt')
+    with open(listing, 'w') as file:
+        for name in sorted(glob.glob(os.path.join(folder, f'frame_*{extension}'))):
+            file.write(f"file '{os.path.abspath(name)}'\nduration {1 / fps:.6f}\n")
+    subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', listing,
+                    '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-pix_fmt', 'yuv420p', output], check=True)
+    shutil.rmtree(folder)
+    return output
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the live scalogram views of a recording")
+    parser.add_argument('path', help="Recording (CSV or .imuz)")
+    parser.add_argument('output', help="PNG folder, or video file such as session.mp4")
+    parser.add_argument('--style', choices=sorted(RENDERERS), default='rgb')
+    parser.add_argument('--step', type=int, default=1, help="Render every n-th sample")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--dpi', type=int, default=80)
+    args = parser.parse_args()
+
+    result = export_animation(args.path, args.output, args.style, args.step, args.workers, args.dpi)
+    print(f"Saved to: {result}")
+
+if __name__ == "__main__":
+    main()
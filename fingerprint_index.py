@@ -0,0 +1,296 @@
+import os
+import json
+import argparse
+from functools import lru_cache
+import numpy as np
+from scipy import signal
+from imu_archive import load_recording
+from resampler import resample
+from scalogram_compositor import ricker_cwt_matrix
+
+# Index layout:
+#   <index>/meta.json      parameters, recordings and the feature normalization
+#   <index>/vectors.npy    float32 (windows, dims) z-normalized fingerprints
+#   <index>/norms.npy      float32 (windows,) squared norms for fast distances
+#   <index>/windows.npy    int64 (windows, 2) recording number, start sample
+
+
+def load_uniform(path, rate):
+    """Load a recording resampled onto a uniform grid at rate"""
+    timestamps, data, signal_names = load_recording(path)
+    grid, data, _ = resample(timestamps, data, rate)
+    return grid, data, signal_names
+
+
+class Fingerprinter:
+    def __init__(self, window=50, widths=np.arange(1, 31), n_bands=8):
+        """
+        Fixed-length fingerprint of a multi-axis window
+
+        Per channel: log band energies of the ricker scalogram (scales grouped
+        into n_bands non-overlapping, roughly log-spaced bands of at least one
+        scale each) and log standard deviation; plus the correlation between
+        the three accelerometer axes.
+        """
+        self.window = window
+        self.widths = np.asarray(widths)
+        n_scales = len(self.widths)
+        if not 1 <= n_bands <= n_scales:
+            raise ValueError(f"n_bands must be between 1 and the {n_scales} scales, got {n_bands}")
+        self.matrix = ricker_cwt_matrix(self.widths, window)
+        # Band b covers scales edges[b]:edges[b + 1]; nudge the log-spaced edges
+        # apart so no band is empty and exactly n_bands remain
+        edges = np.floor(np.geomspace(1, n_scales + 1, n_bands + 1)).astype(int) - 1
+        edges[0], edges[-1] = 0, n_scales
+        for b in range(1, n_bands):
+            edges[b] = min(max(edges[b], edges[b - 1] + 1), n_scales - (n_bands - b))
+        self.bands = np.zeros((n_bands, n_scales), dtype=np.float32)
+        for b, (lo, hi) in enumerate(zip(edges[:-1], edges[1:])):
+            self.bands[b, lo:hi] = 1.0 / (hi - lo)
+
+    def __call__(self, windows):
+        """Fingerprints of windows shaped (n, window, 6), returns (n, dims)"""
+        windows = np.asarray(windows, dtype=np.float32)
+        centered = windows - windows.mean(axis=1, keepdims=True)
+        # (scales, w, w) @ (n, 1, w, 6) -> (n, scales, w, 6) -> energy per scale (n, scales, 6)
+        energy = np.mean(np.matmul(self.matrix, centered[:, None]) ** 2, axis=2)
+        band_energy = np.log1p(np.einsum('bs,nsc->ncb', self.bands, energy)).reshape(len(windows), -1)
+        std = centered.std(axis=1)
+        accel = centered[:, :, 3:6] / np.maximum(std[:, None, 3:6], 1e-6)
+        correlation = np.stack([np.mean(accel[:, :, i] * accel[:, :, j], axis=1)
+                                for i, j in [(0, 1), (0, 2), (1, 2)]], axis=1)
+        return np.hstack([band_energy, np.log1p(std), correlation]).astype(np.float32)
+
+    def recording(self, data, stride):
+        """Fingerprints of every window of a (samples, 6) recording"""
+        starts = np.arange(0, len(data) - self.window + 1, stride)
+        if not len(starts):
+            return starts, np.empty((0, 0), dtype=np.float32)
+        windows = data[starts[:, None] + np.arange(self.window)]
+        return starts, self(windows)
+
+
+def build_index(paths, folder, rate=10.0, window=50, stride=10):
+    """
+    Fingerprint every window of every recording into an on-disk index
+
+    Args:
+        paths (list): Recordings (CSV or .imuz)
+        folder (str): Index folder
+        rate (float): Common rate all recordings are resampled to
+        window (int): Samples per fingerprinted window
+        stride (int): Samples between windows
+    """
+    os.makedirs(folder, exist_ok=True)
+    fingerprinter = Fingerprinter(window)
+    vectors, windows, recordings = [], [], []
+    for path in paths:
+        _, data, _ = load_uniform(path, rate)
+        starts, features = fingerprinter.recording(data, stride)
+        if not len(starts):
+            continue
+        windows.append(np.column_stack([np.full(len(starts), len(recordings)), starts]))
+        vectors.append(features)
+        recordings.append(os.path.abspath(path))
+        print(f"{path}: {len(starts)} windows")
+
+    vectors = np.vstack(vectors)
+    mean, std = vectors.mean(axis=0), np.maximum(vectors.std(axis=0), 1e-6)
+    vectors = ((vectors - mean) / std).astype(np.float32)
+    np.save(os.path.join(folder, 'vectors.npy'), vectors)
+    np.save(os.path.join(folder, 'norms.npy'), np.sum(vectors ** 2, axis=1))
+    np.save(os.path.join(folder, 'windows.npy'), np.vstack(windows).astype(np.int64))
+    with open(os.path.join(folder, 'meta.json'), 'w') as file:
+        json.dump({'rate': rate, 'window': window, 'stride': stride, 'recordings': recordings,
+                   'mean': mean.tolist(), 'std': std.tolist()}, file, indent=2)
+    return folder
+
+
+class FingerprintIndex:
+    def __init__(self, folder, cache_size=16):
+        """
+        k-nearest-neighbour search over an index written by build_index
+
+        Args:
+            folder (str): Index folder
+            cache_size (int): Resampled recordings kept in memory for alignment
+        """
+        with open(os.path.join(folder, 'meta.json')) as file:
+            self.meta = json.load(file)
+        self.vectors = np.load(os.path.join(folder, 'vectors.npy'), mmap_mode='r')
+        self.norms = np.load(os.path.join(folder, 'norms.npy'))
+        self.windows = np.load(os.path.join(folder, 'windows.npy'))
+        self.mean = np.array(self.meta['mean'], dtype=np.float32)
+        self.std = np.array(self.meta['std'], dtype=np.float32)
+        self.rate = self.meta['rate']
+        self.fingerprinter = Fingerprinter(self.meta['window'])
+        self._uniform = lru_cache(maxsize=cache_size)(self._load_uniform)
+
+    def normalize(self, features):
+        return ((features - self.mean) / self.std).astype(np.float32)
+
+    def squared_distances(self, queries):
+        """Squared distances (m, windows) from normalized query vectors to every indexed window"""
+        queries = np.atleast_2d(queries)
+        # |q - v|^2 = |q|^2 - 2 q.v + |v|^2, one matrix product for all queries
+        distances = self.norms[None, :] - 2 * queries @ np.asarray(self.vectors).T
+        distances += np.sum(queries ** 2, axis=1)[:, None]
+        return distances
+
+    def search(self, queries, k=5, exclude_recording=None):
+        """
+        Nearest indexed windows for normalized query vectors (m, dims)
+
+        Returns:
+            tuple: (distances (m, k), window numbers (m, k)), closest first
+        """
+        distances = self.squared_distances(queries)
+        if exclude_recording is not None:
+            distances[:, self.windows[:, 0] == exclude_recording] = np.inf
+        k = min(k, distances.shape[1])
+        nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(distances, nearest, axis=1).argsort(axis=1)
+        nearest = np.take_along_axis(nearest, order, axis=1)
+        return np.sqrt(np.maximum(np.take_along_axis(distances, nearest, axis=1), 0)), nearest
+
+    def _load_uniform(self, path):
+        return load_uniform(path, self.rate)
+
+    def align(self, query, match, search=None):
+        """
+        Refine a match by FFT cross-correlation of the raw windows
+
+        Args:
+            query (np.ndarray): Query window (window, 6)
+            match (int): Indexed window number
+            search (int): Samples searched either side, one window if None
+
+        Returns:
+            tuple: (aligned start sample, normalized correlation peak)
+        """
+        recording, start = self.windows[match]
+        _, data, _ = self._uniform(self.meta['recordings'][recording])
+        window = len(query)
+        search = window if search is None else search
+        lo, hi = max(0, start - search), min(len(data), start + window + search)
+        region = data[lo:hi]
+
+        # Pearson correlation of every candidate offset, averaged over channels
+        q = (query - query.mean(axis=0)) / np.maximum(query.std(axis=0), 1e-6)
+        ones = np.ones((window, 1))
+        correlation = signal.fftconvolve(region, q[::-1], mode='valid', axes=0)
+        total = signal.fftconvolve(region, ones, mode='valid', axes=0)
+        squares = signal.fftconvolve(region ** 2, ones, mode='valid', axes=0)
+        std = np.sqrt(np.maximum(squares / window - (total / window) ** 2, 0))
+        score = np.mean(correlation / (window * np.maximum(std, 1e-6)), axis=1)
+        best = int(np.argmax(score))
+        return int(lo + best), float(score[best])
+
+    def query_window(self, path, t_start, k=5, exclude_self=True):
+        """
+        Recordings/times most similar to the window of path starting at t_start
+
+        Overlapping indexed windows around one event all match and align to
+        the same spot, so candidates closer than one window to an accepted
+        match in the same recording are skipped; more candidates are fetched
+        until k distinct matches are found or the index runs out.
+
+        Returns:
+            list: (recording, aligned start time, fingerprint distance, correlation)
+        """
+        window = self.meta['window']
+        grid, data, _ = self._uniform(path)
+        start = int(np.clip(np.searchsorted(grid, t_start), 0, len(data) - window))
+        query = data[start:start + window]
+        features = self.normalize(self.fingerprinter(query[None]))
+        own = self._recording_number(path) if exclude_self else None
+
+        results, accepted = [], {}
+        fetch, checked = 4 * k, 0
+        while len(results) < k and checked < len(self.windows):
+            distances, nearest = self.search(features, fetch, exclude_recording=own)
+            for distance, match in zip(distances[0, checked:], nearest[0, checked:]):
+                if not np.isfinite(distance) or len(results) == k:
+                    break
+                recording_number, match_start = self.windows[match]
+                taken = accepted.setdefault(recording_number, [])
+                if any(abs(match_start - other) < window for other in taken):
+                    continue
+                aligned, score = self.align(query, match)
+                if any(abs(aligned - other) < window for other in taken):
+                    continue
+                taken.append(aligned)
+                recording = self.meta['recordings'][recording_number]
+                match_grid = self._uniform(recording)[0]
+                results.append((recording, float(match_grid[aligned]), float(distance), score))
+            checked = nearest.shape[1]
+            if not np.isfinite(distances[0, -1]):
+                break
+            fetch *= 2
+        return results
+
+    def query_recording(self, path, k=5):
+        """
+        Other recordings ranked by how closely they match path throughout
+
+        Every window of path is compared with its nearest window in each
+        recording, and recordings are ranked on the mean of those distances,
+        so a recording only ranks high if it resembles all of path.
+
+        Returns:
+            list: (recording, mean nearest-window distance, query windows)
+        """
+        _, data, _ = self._uniform(path)
+        _, features = self.fingerprinter.recording(data, self.meta['stride'])
+        if not len(features):
+            raise ValueError(f"{path} has {len(data)} samples at {self.rate} Hz, "
+                             f"shorter than one {self.meta['window']}-sample window")
+        distances = self.squared_distances(self.normalize(features))
+        # build_index writes each recording's windows contiguously, so the
+        # nearest window per recording is one reduceat over the columns
+        recordings, first = np.unique(self.windows[:, 0], return_index=True)
+        nearest = np.sqrt(np.maximum(np.minimum.reduceat(distances, first, axis=1), 0))
+        mean = nearest.mean(axis=0)
+        own = self._recording_number(path)
+        ranked = [i for i in np.argsort(mean) if recordings[i] != own][:k]
+        return [(self.meta['recordings'][recordings[i]], float(mean[i]), len(features)) for i in ranked]
+
+    def _recording_number(self, path):
+        path = os.path.abspath(path)
+        return self.meta['recordings'].index(path) if path in self.meta['recordings'] else None
+
+def main():
+    parser = argparse.ArgumentParser(description="Scalogram fingerprint index for similarity search")
+    parser.add_argument('--index', default='fingerprint_index', help="Index folder")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="Fingerprint recordings")
+    build.add_argument('paths', nargs='+')
+    build.add_argument('--rate', type=float, default=10.0, help="Common resampling rate in Hz")
+    build.add_argument('--window', type=int, default=50)
+    build.add_argument('--stride', type=int, default=10)
+
+    query = commands.add_parser('query', help="Find similar windows or recordings")
+    query.add_argument('path', help="Query recording")
+    query.add_argument('--time', type=float, default=None, help="Window start time; whole recording if omitted")
+    query.add_argument('-k', type=int, default=5)
+
+    args = parser.parse_args()
+    if args.command == 'build':
+        build_index(args.paths, args.index, args.rate, args.window, args.stride)
+        return
+
+    index = FingerprintIndex(args.index)
+    if args.time is None:
+        try:
+            ranked = index.query_recording(args.path, args.k)
+        except ValueError as error:
+            parser.error(str(error))
+        for recording, distance, windows in ranked:
+            print(f"{recording}  distance {distance:.3f} over {windows} windows")
+    else:
+        for recording, t_start, distance, score in index.query_window(args.path, args.time, args.k):
+            print(f"{recording}  t={t_start:.2f} s  distance {distance:.3f}  correlation {score:.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+import os
+import re
+import csv
+import glob
+import json
+import mmap
+import zlib
+import struct
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# File layout:
+#   header  : MAGIC, version
+#   chunks  : zlib(shuffled int32 time deltas [ms] + int16 column-wise sample deltas)
+#   index   : zlib(JSON) with signal names, metadata and per-chunk bounds
+#   trailer : index offset, index length, MAGIC
+MAGIC = b'IMUZ'
+VERSION = 1
+HEADER = struct.Struct('<4sB3x')
+TRAILER = struct.Struct('<QI4s')
+
+SIGNAL_NAMES = ['X-Gyro', 'Y-Gyro', 'Z-Gyro', 'X-Accel', 'Y-Accel', 'Z-Accel']
+
+
+def _shuffle(array):
+    """Group the bytes of each word by significance so zlib sees long runs"""
+    return array.view(np.uint8).reshape(-1, array.itemsize).T.tobytes()
+
+
+def _unshuffle(raw, dtype, count):
+    itemsize = np.dtype(dtype).itemsize
+    planes = np.frombuffer(raw, dtype=np.uint8, count=count * itemsize)
+    return planes.reshape(itemsize, count).T.copy().view(dtype).ravel()
+
+
+def encode_chunk(time_ms, values, level=6):
+    """Delta-encode one chunk and compress it
+
+    Args:
+        time_ms (np.ndarray): int64 timestamps in milliseconds, shape (n,)
+        values (np.ndarray): int16 samples, shape (n, channels)
+        level (int): zlib compression level
+    """
+    # Int16 deltas wrap around, and so does the int16 cumsum that undoes them
+    time_deltas = np.diff(time_ms, prepend=time_ms[0]).astype(np.int32)
+    value_deltas = np.diff(values, axis=0, prepend=np.zeros((1, values.shape[1]), np.int16))
+    raw = _shuffle(time_deltas) + _shuffle(np.ascontiguousarray(value_deltas.T))
+    return zlib.compress(raw, level)
+
+
+def decode_chunk(payload, t0_ms, n_samples, n_channels):
+    """Inverse of encode_chunk, returns (time_ms, values)"""
+    raw = zlib.decompress(payload)
+    time_deltas = _unshuffle(raw, np.int32, n_samples)
+    value_deltas = _unshuffle(raw[n_samples * 4:], np.int16, n_samples * n_channels)
+    time_ms = t0_ms + np.cumsum(time_deltas, dtype=np.int64)
+    values = np.cumsum(value_deltas.reshape(n_channels, n_samples), axis=1, dtype=np.int16)
+    return time_ms, values.T
+
+
+def to_int16(values):
+    """Round sensor readings to the int16 range the MPU6050 reports"""
+    return np.clip(np.rint(values), -32768, 32767).astype(np.int16)
+
+
+class IMUArchiveWriter:
+    def __init__(self, path, signal_names=SIGNAL_NAMES, chunk_size=4096, level=6, metadata=None):
+        """
+        Create a chunked, delta-encoded IMU archive
+
+        Args:
+            path (str): Output file
+            signal_names (list): Channel names, in column order
+            chunk_size (int): Samples per compressed chunk
+            level (int): zlib compression level (1 = fastest)
+            metadata (dict): Free-form JSON metadata stored in the index
+        """
+        self.path = path
+        self.signal_names = list(signal_names)
+        self.chunk_size = chunk_size
+        self.level = level
+        self.metadata = dict(metadata or {})
+        self.chunks = []
+        self._pending_time = []
+        self._pending_values = []
+        self._pending_count = 0
+        self._file = open(path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, VERSION))
+
+    def append(self, timestamps, values):
+        """Append samples (timestamps in seconds, values shaped (n, channels))"""
+        time_ms = np.rint(np.asarray(timestamps, dtype=np.float64) * 1000).astype(np.int64)
+        values = to_int16(np.asarray(values).reshape(len(time_ms), len(self.signal_names)))
+        self._pending_time.append(time_ms)
+        self._pending_values.append(values)
+        self._pending_count += len(time_ms)
+        if self._pending_count >= self.chunk_size:
+            self._flush(final=False)
+
+    def _flush(self, final):
+        if not self._pending_count:
+            return
+        time_ms = np.concatenate(self._pending_time)
+        values = np.concatenate(self._pending_values)
+        n_full = len(time_ms) if final else len(time_ms) - len(time_ms) % self.chunk_size
+        for start in range(0, n_full, self.chunk_size):
+            self._write_chunk(time_ms[start:start + self.chunk_size],
+                              values[start:start + self.chunk_size])
+        self._pending_time = [time_ms[n_full:]]
+        self._pending_values = [values[n_full:]]
+        self._pending_count = len(time_ms) - n_full
+
+    def _write_chunk(self, time_ms, values):
+        payload = encode_chunk(time_ms, values, self.level)
+        self.chunks.append({
+            'offset': self._file.tell(),
+            'length': len(payload),
+            'samples': len(time_ms),
+            't0_ms': int(time_ms[0]),
+            't_start': time_ms[0] / 1000.0,
+            't_end': time_ms[-1] / 1000.0,
+            'min': values.min(axis=0).tolist(),
+            'max': values.max(axis=0).tolist(),
+        })
+        self._file.write(payload)
+
+    def close(self):
+        """Flush remaining samples and write the chunk index"""
+        if self._file.closed:
+            return
+        self._flush(final=True)
+        index = zlib.compress(json.dumps({
+            'signal_names': self.signal_names,
+            'metadata': self.metadata,
+            'chunks': self.chunks,
+        }).encode('utf-8'), self.level)
+        offset = self._file.tell()
+        self._file.write(index)
+        self._file.write(TRAILER.pack(offset, len(index), MAGIC))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class IMUArchiveReader:
+    def __init__(self, path):
+        """
+        Open an archive written by IMUArchiveWriter
+
+        Args:
+            path (str): Archive file
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version = HEADER.unpack_from(self._mm, 0)
+        offset, length, tail_magic = TRAILER.unpack_from(self._mm, len(self._mm) - TRAILER.size)
+        if magic != MAGIC or tail_magic != MAGIC:
+            raise ValueError(f"{path} is not an IMU archive")
+        if version > VERSION:
+            raise ValueError(f"{path} uses archive version {version}, newer than {VERSION}")
+
+        index = json.loads(zlib.decompress(self._mm[offset:offset + length]))
+        self.signal_names = index['signal_names']
+        self.metadata = index['metadata']
+        self.chunks = index['chunks']
+        self.n_samples = sum(chunk['samples'] for chunk in self.chunks)
+        self.t_start = self.chunks[0]['t_start'] if self.chunks else 0.0
+        self.t_end = self.chunks[-1]['t_end'] if self.chunks else 0.0
+
+    def find_chunks(self, t_start=None, t_end=None):
+        """Return the indices of the chunks overlapping [t_start, t_end]"""
+        return [
+            i for i, chunk in enumerate(self.chunks)
+            if (t_start is None or chunk['t_end'] >= t_start)
+            and (t_end is None or chunk['t_start'] <= t_end)
+        ]
+
+    def read_chunk(self, i):
+        """Decode chunk i, returns (timestamps in seconds, int16 values)"""
+        chunk = self.chunks[i]
+        payload = self._mm[chunk['offset']:chunk['offset'] + chunk['length']]
+        time_ms, values = decode_chunk(payload, chunk['t0_ms'], chunk['samples'],
+                                       len(self.signal_names))
+        return time_ms / 1000.0, values
+
+    def read(self, t_start=None, t_end=None, workers=4):
+        """
+        Read all samples within [t_start, t_end]
+
+        Chunks outside the range are never touched; the rest are
+        decompressed in parallel (zlib releases the GIL).
+
+        Returns:
+            tuple: (timestamps in seconds, int16 values shaped (n, channels))
+        """
+        selected = self.find_chunks(t_start, t_end)
+        if not selected:
+            return np.empty(0), np.empty((0, len(self.signal_names)), np.int16)
+        if workers > 1 and len(selected) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(self.read_chunk, selected))
+        else:
+            parts = [self.read_chunk(i) for i in selected]
+        timestamps = np.concatenate([t for t, _ in parts])
+        values = np.concatenate([v for _, v in parts])
+
+        mask = np.ones(len(timestamps), dtype=bool)
+        if t_start is not None:
+            mask &= timestamps >= t_start
+        if t_end is not None:
+            mask &= timestamps <= t_end
+        return timestamps[mask], values[mask]
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_archive(path, timestamps, values, signal_names=SIGNAL_NAMES, metadata=None, **kwargs):
+    """Write a whole recording to an archive in one call"""
+    with IMUArchiveWriter(path, signal_names, metadata=metadata, **kwargs) as writer:
+        writer.append(timestamps, values)
+    return path
+
+
+def read_csv(filename):
+    """Read a CSV written by IMUDataLogger.save_data"""
+    with open(filename, newline='') as file:
+        header = next(csv.reader(file))
+        table = np.loadtxt(file, delimiter=',', ndmin=2)
+    if table.size == 0:
+        table = np.empty((0, len(header)))
+    return table[:, 0], table[:, 1:], header[1:]
+
+
+def load_recording(path, t_start=None, t_end=None):
+    """
+    Load a recording from either a CSV or an archive
+
+    Returns:
+        tuple: (timestamps in seconds, values shaped (n, 6), signal names)
+    """
+    if path.endswith('.imuz'):
+        with IMUArchiveReader(path) as reader:
+            timestamps, values = reader.read(t_start, t_end)
+            return timestamps, values.astype(np.float64), reader.signal_names
+
+    timestamps, values, signal_names = read_csv(path)
+    mask = np.ones(len(timestamps), dtype=bool)
+    if t_start is not None:
+        mask &= timestamps >= t_start
+    if t_end is not None:
+        mask &= timestamps <= t_end
+    return timestamps[mask], values[mask], signal_names
+
+
+def parse_statistics(filename):
+    """
+    Parse an imu_stats_*.txt file written by IMUDataLogger.save_statistics
+
+    Returns:
+        dict: {'duration', 'samples', 'rate', 'signals': {name: {stat: value}}}
+    """
+    stats = {'signals': {}}
+    current = None
+    timing_keys = {
+        'Total duration': 'duration',
+        'Total samples': 'samples',
+        'Average sampling rate': 'rate',
+    }
+    signal_keys = {'Mean': 'mean', 'Std Dev': 'std', 'Min': 'min', 'Max': 'max'}
+    with open(filename) as file:
+        for line in file:
+            line = line.rstrip()
+            match = re.match(r'^(\S.*?):\s*([-\d.]+)', line)
+            if match and match.group(1) in timing_keys:
+                stats[timing_keys[match.group(1)]] = float(match.group(2))
+                continue
+            match = re.match(r'^([A-Z]-\w+):$', line)
+            if match:
+                current = stats['signals'].setdefault(match.group(1), {})
+                continue
+            match = re.match(r'^\s+(Mean|Std Dev|Min|Max):\s*([-\d.]+)', line)
+            if match and current is not None:
+                current[signal_keys[match.group(1)]] = float(match.group(2))
+    return stats
+
+
+def convert_csv(csv_path, stats_path=None, archive_path=None, **kwargs):
+    """
+    Convert an imu_data_*.csv (and its imu_stats_*.txt) to an archive
+
+    Args:
+        csv_path (str): Recording written by IMUDataLogger.save_data
+        stats_path (str): Matching statistics file, looked up by name if None
+        archive_path (str): Output file, defaults to the CSV name with .imuz
+    """
+    if stats_path is None:
+        candidate = os.path.join(os.path.dirname(csv_path),
+                                 os.path.basename(csv_path).replace('imu_data_', 'imu_stats_', 1))
+        candidate = os.path.splitext(candidate)[0] + '.txt'
+        if candidate != csv_path and os.path.exists(candidate):
+            stats_path = candidate
+    if archive_path is None:
+        archive_path = os.path.splitext(csv_path)[0] + '.imuz'
+
+    timestamps, values, signal_names = read_csv(csv_path)
+    metadata = {'source': os.path.basename(csv_path)}
+    if stats_path is not None:
+        metadata['statistics'] = parse_statistics(stats_path)
+    write_archive(archive_path, timestamps, values, signal_names, metadata=metadata, **kwargs)
+    return archive_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert imu_data_*.csv recordings to .imuz archives")
+    parser.add_argument('paths', nargs='*', default=['.'], help="CSV files or folders to scan")
+    parser.add_argument('--chunk-size', type=int, default=4096, help="Samples per chunk")
+    parser.add_argument('--level', type=int, default=6, help="zlib compression level")
+    args = parser.parse_args()
+
+    csv_files = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            csv_files.extend(sorted(glob.glob(os.path.join(path, 'imu_data_*.csv'))))
+        else:
+            csv_files.append(path)
+
+    for csv_path in csv_files:
+        archive_path = convert_csv(csv_path, chunk_size=args.chunk_size, level=args.level)
+        ratio = os.path.getsize(csv_path) / os.path.getsize(archive_path)
+        print(f"{csv_path} -> {archive_path} ({ratio:.1f}x smaller)")
+
+if __name__ == "__main__":
+    main()
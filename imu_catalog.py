@@ -0,0 +1,268 @@
+import os
+import re
+import glob
+import time
+import sqlite3
+import hashlib
+import argparse
+import numpy as np
+from imu_archive import load_recording
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recordings (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    sha1 TEXT NOT NULL,
+    samples INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    rate REAL NOT NULL,
+    effective_rate REAL NOT NULL,
+    window_length REAL,
+    scanned_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS signal_stats (
+    recording_id INTEGER NOT NULL REFERENCES recordings(id) ON DELETE CASCADE,
+    signal TEXT NOT NULL,
+    mean REAL, std REAL, min REAL, max REAL,
+    PRIMARY KEY (recording_id, signal)
+);
+CREATE TABLE IF NOT EXISTS window_stats (
+    recording_id INTEGER NOT NULL REFERENCES recordings(id) ON DELETE CASCADE,
+    window INTEGER NOT NULL,
+    t_start REAL NOT NULL,
+    t_end REAL NOT NULL,
+    signal TEXT NOT NULL,
+    mean REAL, std REAL, min REAL, max REAL,
+    PRIMARY KEY (recording_id, window, signal)
+);
+CREATE INDEX IF NOT EXISTS signal_stats_by_signal ON signal_stats(signal, max);
+CREATE INDEX IF NOT EXISTS window_stats_by_signal ON window_stats(signal, max);
+"""
+
+STATS = ('mean', 'std', 'min', 'max')
+FILTER = re.compile(r'^\s*([\w-]+)\.(mean|std|min|max)\s*(<=|>=|<|>|=)\s*(-?[\d.]+)\s*$')
+
+
+def file_sha1(path, block_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def summarize(timestamps, data):
+    """Session summary with the same metrics IMUDataLogger.save_statistics writes"""
+    duration = float(timestamps[-1])
+    span = float(timestamps[-1] - timestamps[0])
+    return {
+        'samples': len(data),
+        'duration': duration,
+        'rate': len(data) / duration if duration > 0 else 0.0,
+        'effective_rate': (len(data) - 1) / span if span > 0 else 0.0,
+        'mean': np.mean(data, axis=0),
+        'std': np.std(data, axis=0),
+        'min': np.min(data, axis=0),
+        'max': np.max(data, axis=0),
+    }
+
+
+def summarize_windows(timestamps, data, window):
+    """
+    Per-window mean/std/min/max for every channel, without a Python loop
+
+    Returns:
+        tuple: (window numbers, t_start, t_end, {stat: array (windows, channels)})
+    """
+    bins = np.floor((timestamps - timestamps[0]) / window).astype(np.int64)
+    starts = np.flatnonzero(np.diff(bins, prepend=-1))
+    counts = np.diff(np.append(starts, len(bins)))[:, None]
+    sums = np.add.reduceat(data, starts, axis=0)
+    squares = np.add.reduceat(data * data, starts, axis=0)
+    mean = sums / counts
+    stats = {
+        'mean': mean,
+        'std': np.sqrt(np.maximum(squares / counts - mean * mean, 0.0)),
+        'min': np.minimum.reduceat(data, starts, axis=0),
+        'max': np.maximum.reduceat(data, starts, axis=0),
+    }
+    ends = np.append(starts[1:], len(bins)) - 1
+    return bins[starts], timestamps[starts], timestamps[ends], stats
+
+
+class IMUCatalog:
+    def __init__(self, db_path='imu_catalog.sqlite', window=10.0):
+        """
+        SQLite catalog of recordings and their precomputed summaries
+
+        Args:
+            db_path (str): Catalog database file
+            window (float): Window length in seconds for per-window summaries
+        """
+        self.window = window
+        self.db = sqlite3.connect(db_path)
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.executescript(SCHEMA)
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(recordings)")}
+        if 'window_length' not in columns:  # catalogs created before window lengths were stored
+            self.db.execute("ALTER TABLE recordings ADD COLUMN window_length REAL")
+
+    def scan(self, folders, prune=True):
+        """
+        Index new or changed recordings under the given folders
+
+        Files whose size and mtime are unchanged are skipped without being
+        read; touched but identical files are recognised by their hash.
+        Files summarized with a different window length are re-indexed. A
+        session converted with imu_archive.convert_csv is catalogued once,
+        through its .imuz.
+        """
+        known = {
+            path: (row_id, size, mtime, sha1, window_length)
+            for row_id, path, size, mtime, sha1, window_length
+            in self.db.execute("SELECT id, path, size, mtime, sha1, window_length FROM recordings")
+        }
+        seen, superseded = set(), set()
+        counts = {'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0}
+
+        for folder in folders:
+            paths = {}
+            for path in sorted(glob.glob(os.path.join(folder, 'imu_data_*.csv')) +
+                               glob.glob(os.path.join(folder, '*.imuz'))):
+                stem, ext = os.path.splitext(os.path.abspath(path))
+                if stem in paths and ext == '.csv':
+                    superseded.add(stem + ext)
+                    continue
+                if stem in paths:
+                    superseded.add(paths[stem])
+                paths[stem] = stem + ext
+
+            for path in sorted(paths.values()):
+                seen.add(path)
+                info = os.stat(path)
+                entry = known.get(path)
+                same_window = entry is not None and entry[4] == self.window
+                if same_window and entry[1] == info.st_size and entry[2] == info.st_mtime:
+                    counts['unchanged'] += 1
+                    continue
+
+                sha1 = file_sha1(path)
+                if same_window and entry[3] == sha1:
+                    self.db.execute("UPDATE recordings SET mtime = ? WHERE id = ?",
+                                    (info.st_mtime, entry[0]))
+                    counts['unchanged'] += 1
+                    continue
+
+                if self._index_recording(path, info, sha1, entry[0] if entry else None):
+                    counts['updated' if entry else 'added'] += 1
+
+        for path in superseded & set(known):
+            self.db.execute("DELETE FROM recordings WHERE path = ?", (path,))
+            counts['removed'] += 1
+
+        if prune:
+            for path in set(known) - seen - superseded:
+                if not os.path.exists(path):
+                    self.db.execute("DELETE FROM recordings WHERE path = ?", (path,))
+                    counts['removed'] += 1
+
+        self.db.commit()
+        return counts
+
+    def _index_recording(self, path, info, sha1, row_id):
+        timestamps, data, signal_names = load_recording(path)
+        if len(timestamps) < 2:
+            return False
+        summary = summarize(timestamps, data)
+
+        if row_id is not None:
+            self.db.execute("DELETE FROM recordings WHERE id = ?", (row_id,))
+        cursor = self.db.execute(
+            "INSERT INTO recordings (path, size, mtime, sha1, samples, duration, rate,"
+            " effective_rate, window_length, scanned_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, info.st_size, info.st_mtime, sha1, summary['samples'], summary['duration'],
+             summary['rate'], summary['effective_rate'], self.window, time.time()))
+        recording_id = cursor.lastrowid
+
+        self.db.executemany(
+            "INSERT INTO signal_stats VALUES (?, ?, ?, ?, ?, ?)",
+            [(recording_id, name) + tuple(float(summary[stat][i]) for stat in STATS)
+             for i, name in enumerate(signal_names)])
+
+        windows, starts, ends, stats = summarize_windows(timestamps, data, self.window)
+        self.db.executemany(
+            "INSERT INTO window_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(recording_id, int(windows[w]), float(starts[w]), float(ends[w]), name) +
+             tuple(float(stats[stat][w, i]) for stat in STATS)
+             for w in range(len(windows)) for i, name in enumerate(signal_names)])
+        return True
+
+    def query(self, filters, windows=False):
+        """
+        Find recordings (or windows) matching all filters
+
+        Args:
+            filters (list): Expressions like "X-Gyro.max>20000"
+            windows (bool): Match per-window summaries instead of whole sessions
+
+        Returns:
+            list: Rows of (path, duration, rate) or (path, window, t_start, t_end)
+        """
+        table = 'window_stats' if windows else 'signal_stats'
+        join_key = 'recording_id, window' if windows else 'recording_id'
+        clauses, params = [], []
+        for expression in filters:
+            match = FILTER.match(expression)
+            if not match:
+                raise ValueError(f"Bad filter {expression!r}, expected e.g. 'X-Gyro.max>20000'")
+            signal_name, stat, op, value = match.groups()
+            clauses.append(f"SELECT {join_key} FROM {table} WHERE signal = ? AND {stat} {op} ?")
+            params.extend([signal_name, float(value)])
+        matches = " INTERSECT ".join(clauses) or f"SELECT {join_key} FROM {table}"
+
+        if windows:
+            sql = (f"SELECT DISTINCT r.path, w.window, w.t_start, w.t_end FROM recordings r"
+                   f" JOIN window_stats w ON w.recording_id = r.id"
+                   f" WHERE (w.recording_id, w.window) IN ({matches})"
+                   f" ORDER BY r.path, w.window")
+        else:
+            sql = (f"SELECT r.path, r.duration, r.rate FROM recordings r"
+                   f" WHERE r.id IN ({matches}) ORDER BY r.path")
+        return self.db.execute(sql, params).fetchall()
+
+    def close(self):
+        self.db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Catalog IMU recordings and query their summaries")
+    parser.add_argument('--db', default='imu_catalog.sqlite', help="Catalog database file")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    scan = commands.add_parser('scan', help="Index new or changed recordings")
+    scan.add_argument('folders', nargs='*', default=['.'])
+    scan.add_argument('--window', type=float, default=10.0, help="Window length in seconds")
+
+    query = commands.add_parser('query', help="Filter recordings, e.g. 'X-Gyro.max>20000'")
+    query.add_argument('filters', nargs='*')
+    query.add_argument('--windows', action='store_true', help="Match per-window summaries")
+
+    args = parser.parse_args()
+    catalog = IMUCatalog(args.db, window=getattr(args, 'window', 10.0))
+    try:
+        if args.command == 'scan':
+            counts = catalog.scan(args.folders)
+            print(", ".join(f"{count} {name}" for name, count in counts.items()))
+        elif args.windows:
+            for path, window, t_start, t_end in catalog.query(args.filters, windows=True):
+                print(f"{path}  window {window}: {t_start:.2f}-{t_end:.2f} s")
+        else:
+            for path, duration, rate in catalog.query(args.filters):
+                print(f"{path}  {duration:.2f} s @ {rate:.2f} Hz")
+    finally:
+        catalog.close()
+
+if __name__ == "__main__":
+    main()
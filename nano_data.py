@@ -1,4 +1,4 @@
-import serial
+from sample_source import open_source
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
 from collections import deque
@@ -7,7 +7,7 @@ import time
 # Serial port configuration
 port = '/dev/ttyUSB0'  # Replace 'COM3' with your Arduino's port
 baud_rate = 115200
-ser = serial.Serial(port, baud_rate)
+ser = open_source(port, baud_rate)
 
 # Initialize data deque for faster appending and popping
 window_size = 2  # seconds
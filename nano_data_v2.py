@@ -1,84 +1,108 @@
-import serial
+from sample_source import open_source
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
 from collections import deque
-import time
 import numpy as np
-import matplotlib.animation as animation
 import pywt
 
-# Serial port configuration
-port = '/dev/ttyUSB0'  # Replace 'COM3' with your Arduino's port
-baud_rate = 115200
-ser = serial.Serial(port, baud_rate)
-
 # Initialize data deque for faster appending and popping
 window_size = 1  # seconds
 sampling_rate = 10 / 1000  # 33 ms per sample
 maxlen = int(window_size / sampling_rate)
+scalogram_every = int(0.5 / (10 / 1000))  # frames between scalogram updates, assuming interval=10ms
+
+
+class NanoView:
+    def __init__(self):
+        """The figure of this script; export_animation.py renders recordings through it too"""
+        self.ax_data, self.ay_data, self.az_data = deque(maxlen=maxlen), deque(maxlen=maxlen), deque(maxlen=maxlen)
+        self.gx_data, self.gy_data, self.gz_data = deque(maxlen=maxlen), deque(maxlen=maxlen), deque(maxlen=maxlen)
+
+        # Set up the plot
+        self.fig, (ax1, ax2, self.ax3) = plt.subplots(3, 1, figsize=(10, 8))
+        ax1.set_title("Accelerometer Data")
+        ax1.set_ylim(-32768, 32768)  # MPU6050 output range for accelerometer
+        ax1.set_xlim(0, maxlen)      # Display last 2 seconds of data
+        ax2.set_title("Gyroscope Data")
+        ax2.set_ylim(-32768, 32768)  # MPU6050 output range for gyroscope
+        ax2.set_xlim(0, maxlen)      # Display last 2 seconds of data
+        self.ax3.set_title("Scalogram")
+        self.ax3.set_xlabel("Time (s)")
+        self.ax3.set_ylabel("Scale")
+
+        line1, = ax1.plot([], [], label='Ax')
+        line2, = ax1.plot([], [], label='Ay')
+        line3, = ax1.plot([], [], label='Az')
+        line4, = ax2.plot([], [], label='Gx')
+        line5, = ax2.plot([], [], label='Gy')
+        line6, = ax2.plot([], [], label='Gz')
+        self.lines = [line1, line2, line3, line4, line5, line6]
+
+        ax1.legend(loc="upper right")
+        ax2.legend(loc="upper right")
+
+        # Hidden until the first scalogram, then updated in place
+        self.image = self.ax3.imshow(np.zeros((127, maxlen)), cmap='inferno', aspect='auto',
+                                     extent=(0, window_size, 1, 128), visible=False)
+
+    def clear(self):
+        for data in (self.ax_data, self.ay_data, self.az_data, self.gx_data, self.gy_data, self.gz_data):
+            data.clear()
+
+    def append_sample(self, values):
+        """Add one Arduino sample (gx, gy, gz, ax, ay, az) without touching the plots"""
+        gx, gy, gz, ax, ay, az = values
 
-ax_data, ay_data, az_data = deque(maxlen=maxlen), deque(maxlen=maxlen), deque(maxlen=maxlen)
-gx_data, gy_data, gz_data = deque(maxlen=maxlen), deque(maxlen=maxlen), deque(maxlen=maxlen)
-
-# Set up the plot
-fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(10, 8))
-ax1.set_title("Accelerometer Data")
-ax1.set_ylim(-32768, 32768)  # MPU6050 output range for accelerometer
-ax1.set_xlim(0, maxlen)      # Display last 2 seconds of data
-ax2.set_title("Gyroscope Data")
-ax2.set_ylim(-32768, 32768)  # MPU6050 output range for gyroscope
-ax2.set_xlim(0, maxlen)      # Display last 2 seconds of data
-ax3.set_title("Scalogram")
-
-line1, = ax1.plot([], [], label='Ax')
-line2, = ax1.plot([], [], label='Ay')
-line3, = ax1.plot([], [], label='Az')
-line4, = ax2.plot([], [], label='Gx')
-line5, = ax2.plot([], [], label='Gy')
-line6, = ax2.plot([], [], label='Gz')
-
-ax1.legend(loc="upper right")
-ax2.legend(loc="upper right")
-
-# Update function for real-time plotting
-def update(frame):
-    line = ser.readline().decode('utf-8').strip()
-    data = line.split(',')
-    
-    if len(data) == 6:
-        gx, gy, gz, ax, ay, az = map(int, data)
-        
         # Append new data to deques
-        ax_data.append(ax)
-        ay_data.append(ay)
-        az_data.append(az)
-        gx_data.append(gx)
-        gy_data.append(gy)
-        gz_data.append(gz)
-
-        # Update line data
-        line1.set_data(range(len(ax_data)), ax_data)
-        line2.set_data(range(len(ay_data)), ay_data)
-        line3.set_data(range(len(az_data)), az_data)
-        line4.set_data(range(len(gx_data)), gx_data)
-        line5.set_data(range(len(gy_data)), gy_data)
-        line6.set_data(range(len(gz_data)), gz_data)
-
-        # Update scalogram every 0.5 seconds
-        if frame % int(0.5 / (10 / 1000)) == 0:  # Assuming interval=10ms
-            scales = np.arange(1, 128)
-            coefficients, freqs = pywt.cwt(np.array(ax_data), scales, 'morl', sampling_period=10)
-            img = ax3.imshow(np.abs(coefficients), cmap='inferno', aspect='auto', extent=(0, window_size, 1, 128))
-            ax3.set_xlabel("Time (s)")
-            ax3.set_ylabel("Scale")
-            img.set_clim(vmin=0, vmax=np.max(np.abs(coefficients)))  # Set clim to ensure colorbar is updated
-
-    return line1, line2, line3, line4, line5, line6
-
-# Set up the animation
-ani = FuncAnimation(fig, update, interval=10, blit=True, cache_frame_data=False)
-
-plt.tight_layout()
-plt.show()
+        self.ax_data.append(ax)
+        self.ay_data.append(ay)
+        self.az_data.append(az)
+        self.gx_data.append(gx)
+        self.gy_data.append(gy)
+        self.gz_data.append(gz)
+
+    def update_lines(self):
+        for line, data in zip(self.lines, (self.ax_data, self.ay_data, self.az_data,
+                                           self.gx_data, self.gy_data, self.gz_data)):
+            line.set_data(range(len(data)), data)
+
+    def update_scalogram(self, ax_data):
+        """Show the X-Accel scalogram of ax_data"""
+        scales = np.arange(1, 128)
+        coefficients, freqs = pywt.cwt(np.asarray(ax_data), scales, 'morl', sampling_period=10)
+        magnitude = np.abs(coefficients)
+        self.image.set_data(magnitude)
+        self.image.set_visible(True)
+        self.image.set_clim(vmin=0, vmax=np.max(magnitude))  # Set clim to ensure colorbar is updated
+
+
+def main():
+    # Serial port configuration
+    port = '/dev/ttyUSB0'  # Replace 'COM3' with your Arduino's port
+    baud_rate = 115200
+    ser = open_source(port, baud_rate)
+    view = NanoView()
+
+    # Update function for real-time plotting
+    def update(frame):
+        line = ser.readline().decode('utf-8').strip()
+        data = line.split(',')
+
+        if len(data) == 6:
+            view.append_sample(map(int, data))
+            view.update_lines()
+
+            # Update scalogram every 0.5 seconds
+            if frame % scalogram_every == 0:
+                view.update_scalogram(view.ax_data)
+
+        return view.lines
+
+    # Set up the animation
+    ani = FuncAnimation(view.fig, update, interval=10, blit=True, cache_frame_data=False)
 
+    plt.tight_layout()
+    plt.show()
 
+if __name__ == "__main__":
+    main()
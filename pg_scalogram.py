@@ -0,0 +1,44 @@
+from functools import lru_cache
+import numpy as np
+import pyqtgraph as pg
+
+
+@lru_cache(maxsize=None)
+def lookup_table(name='inferno'):
+    """256-entry uint8 lookup table of a colormap, built once per name"""
+    return pg.colormap.get(name).getLookupTable(nPts=256)
+
+
+class ScalogramImage:
+    def __init__(self, image_item, n_scales, n_samples, cmap='inferno', decay=0.98):
+        """
+        Feed scalogram magnitudes to an ImageItem without reallocating
+
+        Magnitudes are quantized in place into a persistent uint8 buffer
+        against a running level (instant attack, slow release), so the
+        ImageItem only ever sees the same pre-leveled array and applies the
+        cached LUT directly.
+
+        Args:
+            image_item (pg.ImageItem): Target item
+            n_scales (int): Rows (CWT scales)
+            n_samples (int): Columns (time samples)
+            cmap (str): Colormap name
+            decay (float): Per-frame decay of the running level
+        """
+        self.item = image_item
+        self.decay = decay
+        self.level = 0.0
+        self.magnitude = np.zeros((n_scales, n_samples), dtype=np.float32)
+        self.pixels = np.zeros((n_scales, n_samples), dtype=np.uint8)
+        self.item.setLookupTable(lookup_table(cmap))
+        self.item.setImage(self.pixels, autoLevels=False, levels=(0, 255))
+
+    def update(self, coefficients):
+        """Quantize |coefficients| (scales x samples) into the display buffer"""
+        np.abs(coefficients, out=self.magnitude, casting='same_kind')
+        self.level = max(float(self.magnitude.max()), self.level * self.decay, 1e-12)
+        np.multiply(self.magnitude, 255.0 / self.level, out=self.magnitude)
+        np.minimum(self.magnitude, 255.0, out=self.magnitude)
+        np.copyto(self.pixels, self.magnitude, casting='unsafe')
+        self.item.setImage(self.pixels, autoLevels=False)
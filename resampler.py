@@ -0,0 +1,253 @@
+import os
+import argparse
+from fractions import Fraction
+import numpy as np
+from scipy import signal
+from imu_archive import load_recording, write_archive
+
+
+def estimate_timing(timestamps, gap_factor=3.0):
+    """
+    Estimate the true sampling rate from jittery arrival timestamps
+
+    Intervals longer than gap_factor x the median are treated as gaps
+    (dropped lines, pauses) and left out of the rate estimate.
+
+    Returns:
+        dict: rate, period, median_period, jitter (std of intervals), gaps [(t_start, t_end)]
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    if len(timestamps) < 2:
+        raise ValueError(f"Need at least 2 samples to estimate timing, got {len(timestamps)}")
+    intervals = np.diff(timestamps)
+    median_period = float(np.median(intervals))
+    in_gap = intervals > gap_factor * median_period
+    regular = intervals[~in_gap]
+    period = float(regular.mean()) if regular.size else median_period
+    gap_index = np.flatnonzero(in_gap)
+    return {
+        'rate': 1.0 / period,
+        'period': period,
+        'median_period': median_period,
+        'jitter': float(regular.std()) if regular.size else 0.0,
+        'gaps': [(float(timestamps[i]), float(timestamps[i + 1])) for i in gap_index],
+    }
+
+
+def fit_timestamps(timestamps, info):
+    """
+    Replace jittery arrival times with a straight-line fit of time on sample index
+
+    The fit is done separately for each gap-free segment. Indices count
+    whole periods between arrivals, so a dropped line inside a segment does
+    not bend the fit.
+
+    Args:
+        timestamps (np.ndarray): Arrival times in seconds
+        info (dict): Result of estimate_timing for these timestamps
+
+    Returns:
+        np.ndarray: Fitted sample times, same shape as timestamps
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    steps = np.maximum(np.rint(np.diff(timestamps) / info['period']), 1)
+    index = np.concatenate([[0.0], np.cumsum(steps)])
+    gap_starts = np.searchsorted(timestamps, [start for start, _ in info['gaps']], side='right')
+    fitted = timestamps.copy()
+    for segment in np.split(np.arange(len(timestamps)), gap_starts):
+        if len(segment) < 2:
+            continue
+        slope, intercept = np.polyfit(index[segment], timestamps[segment], 1)
+        fitted[segment] = intercept + slope * index[segment]
+    # A segment's fitted end must not overrun the next segment's start
+    return np.maximum.accumulate(fitted)
+
+
+def interpolate(timestamps, data, grid):
+    """Linear interpolation of all channels at once (data shaped (n, channels))"""
+    index = np.clip(np.searchsorted(timestamps, grid, side='right'), 1, len(timestamps) - 1)
+    t0, t1 = timestamps[index - 1], timestamps[index]
+    weight = np.clip((grid - t0) / np.where(t1 > t0, t1 - t0, 1.0), 0.0, 1.0)[:, None]
+    before = data[index - 1]
+    return before + weight * (data[index] - before)
+
+
+def resample(timestamps, data, rate=None, method='linear', gap_factor=3.0, max_denominator=64):
+    """
+    Resample a whole recording onto a uniform time grid
+
+    Arrival times are first replaced by fit_timestamps, then the samples
+    are interpolated onto the grid.
+
+    Args:
+        timestamps (np.ndarray): Arrival times in seconds, shape (n,)
+        data (np.ndarray): Samples, shape (n, channels)
+        rate (float): Output rate in Hz, the estimated true rate if None
+        method (str): 'linear', or 'polyphase' (linear onto the estimated
+            rate, then an anti-aliased rational rate change)
+        gap_factor (float): Interval multiple of the median treated as a gap
+        max_denominator (int): Largest up/down factor for 'polyphase'
+
+    Returns:
+        tuple: (uniform timestamps, resampled data, timing info with a
+            'gap_mask' flagging output samples that fall inside gaps)
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    data = np.asarray(data, dtype=np.float64).reshape(len(timestamps), -1)
+    info = estimate_timing(timestamps, gap_factor)
+    # Interpolate against fitted sample times, so arrival jitter is removed
+    # rather than turned into amplitude error
+    timestamps = fit_timestamps(timestamps, info)
+    rate = rate or info['rate']
+    duration = timestamps[-1] - timestamps[0]
+
+    if method == 'linear':
+        grid = timestamps[0] + np.arange(int(duration * rate) + 1) / rate
+        resampled = interpolate(timestamps, data, grid)
+    elif method == 'polyphase':
+        native = timestamps[0] + np.arange(int(duration * info['rate']) + 1) / info['rate']
+        uniform = interpolate(timestamps, data, native)
+        ratio = Fraction(rate / info['rate']).limit_denominator(max_denominator)
+        resampled = signal.resample_poly(uniform, ratio.numerator, ratio.denominator, axis=0)
+        rate = info['rate'] * ratio.numerator / ratio.denominator
+        grid = timestamps[0] + np.arange(len(resampled)) / rate
+    else:
+        raise ValueError(f"Unknown resampling method {method!r}")
+
+    gap_mask = np.zeros(len(grid), dtype=bool)
+    for start, end in info['gaps']:
+        gap_mask |= (grid > start) & (grid < end)
+    info.update(output_rate=rate, gap_mask=gap_mask)
+    return grid, resampled, info
+
+
+class StreamResampler:
+    def __init__(self, rate, n_channels=6, smoothing=0.01, gap_factor=3.0):
+        """
+        Resample live batches onto a uniform grid at a fixed rate
+
+        Like resample(), samples are interpolated against fitted rather than
+        arrival times: a running, exponentially weighted fit of time on
+        sample index, restarted after every gap.
+
+        Args:
+            rate (float): Output rate in Hz
+            n_channels (int): Channels per sample
+            smoothing (float): Weight of each new sample in the running fit
+            gap_factor (float): Interval multiple of the period treated as a gap
+        """
+        self.rate = rate
+        self.n_channels = n_channels
+        self.smoothing = smoothing
+        self.gap_factor = gap_factor
+        self.next_time = None
+        self.last_time = None    # arrival time of the last sample
+        self.last_fitted = None  # its fitted time
+        self.last_values = None
+        self.period_estimate = None
+        self._reset_fit()
+
+    def _reset_fit(self):
+        # Exponentially weighted means and co-moments of (index, time) in the current segment
+        self.index = 0.0
+        self.weight = 0.0
+        self.mean_index = self.mean_time = 0.0
+        self.var_index = self.cov = 0.0
+
+    @property
+    def rate_estimate(self):
+        """Running estimate of the incoming sample rate in Hz"""
+        return 1.0 / self.period_estimate if self.period_estimate else None
+
+    def _fit(self, timestamp):
+        """Add one arrival to the running fit, returns its fitted time"""
+        decay = 1.0 - self.smoothing
+        self.weight = decay * self.weight + 1.0
+        d_index = self.index - self.mean_index
+        self.mean_index += d_index / self.weight
+        self.mean_time += (timestamp - self.mean_time) / self.weight
+        self.var_index = decay * self.var_index + d_index * (self.index - self.mean_index)
+        self.cov = decay * self.cov + d_index * (timestamp - self.mean_time)
+        if self.var_index > 0:
+            self.period_estimate = self.cov / self.var_index
+        if self.period_estimate is None:
+            return timestamp
+        return self.mean_time + self.period_estimate * (self.index - self.mean_index)
+
+    def push(self, timestamps, values):
+        """
+        Add a batch of raw samples
+
+        Returns:
+            tuple: (uniform timestamps, resampled values, gaps [(t_start, t_end)])
+                covered by this batch
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64).reshape(len(timestamps), self.n_channels)
+        if not len(timestamps):
+            return np.empty(0), np.empty((0, self.n_channels)), []
+        if self.period_estimate is None:
+            arrivals = timestamps if self.last_time is None else np.concatenate([[self.last_time], timestamps])
+            if len(arrivals) > 1:
+                self.period_estimate = float(np.median(np.diff(arrivals)))
+
+        gaps = []
+        fitted = np.empty(len(timestamps))
+        last_time, last_fitted = self.last_time, self.last_fitted
+        for i, timestamp in enumerate(timestamps.tolist()):
+            if last_time is not None:
+                interval = timestamp - last_time
+                if interval > self.gap_factor * self.period_estimate:
+                    gaps.append((last_time, timestamp))
+                    self._reset_fit()
+                else:
+                    # Whole periods between arrivals, so a dropped line does not bend the fit
+                    self.index += max(round(interval / self.period_estimate), 1)
+            fitted[i] = self._fit(timestamp)
+            if last_fitted is not None:
+                fitted[i] = max(fitted[i], last_fitted)
+            last_time, last_fitted = timestamp, fitted[i]
+
+        if self.last_fitted is not None:
+            fitted = np.concatenate([[self.last_fitted], fitted])
+            values = np.concatenate([self.last_values[None, :], values])
+        if self.next_time is None:
+            self.next_time = fitted[0]
+
+        count = int(np.floor((fitted[-1] - self.next_time) * self.rate)) + 1
+        grid = self.next_time + np.arange(max(count, 0)) / self.rate
+        resampled = interpolate(fitted, values, grid) if len(grid) else np.empty((0, self.n_channels))
+
+        if len(grid):
+            self.next_time = grid[-1] + 1.0 / self.rate
+        self.last_time, self.last_fitted = last_time, last_fitted
+        self.last_values = values[-1]
+        return grid, resampled, gaps
+
+def main():
+    parser = argparse.ArgumentParser(description="Report timing and resample a recording onto a uniform grid")
+    parser.add_argument('path', help="Recording (CSV or .imuz)")
+    parser.add_argument('--rate', type=float, default=None, help="Output rate in Hz (estimated if omitted)")
+    parser.add_argument('--method', choices=['linear', 'polyphase'], default='linear')
+    parser.add_argument('--output', default=None, help="Write the resampled recording to this .imuz")
+    args = parser.parse_args()
+
+    timestamps, data, signal_names = load_recording(args.path)
+    grid, resampled, info = resample(timestamps, data, args.rate, args.method)
+    print(f"Estimated rate: {info['rate']:.3f} Hz (median interval {info['median_period'] * 1000:.1f} ms, "
+          f"jitter {info['jitter'] * 1000:.1f} ms)")
+    print(f"Gaps: {len(info['gaps'])}")
+    for start, end in info['gaps']:
+        print(f"  {start:.3f} - {end:.3f} s ({end - start:.3f} s)")
+    print(f"Resampled {len(timestamps)} samples to {len(grid)} at {info['output_rate']:.3f} Hz")
+
+    if args.output:
+        write_archive(args.output, grid, resampled, signal_names, metadata={
+            'source': os.path.basename(args.path),
+            'rate': info['output_rate'],
+            'gaps': info['gaps'],
+        })
+        print(f"Saved to: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+import time
+import select
+import argparse
+from collections import deque
+from urllib.parse import urlsplit, parse_qs, unquote
+import numpy as np
+import serial
+from imu_archive import load_recording
+from serial_broker import BrokerClient
+
+
+class SampleSource:
+    """
+    Base class of the sample sources the viewers and loggers read from
+
+    Subclasses implement read_batch(); this class turns batches into the
+    readline()/in_waiting/close() subset of serial.Serial the existing
+    tools use, and clock() gives the timestamp of the last sample read.
+    """
+
+    def __init__(self):
+        self.lines = deque()
+        self.last_time = None
+
+    def read_batch(self):
+        """Block until samples are available, returns (timestamps, int16 values)"""
+        raise NotImplementedError
+
+    def pending(self):
+        """Samples that could be read right now without blocking"""
+        return 0
+
+    @property
+    def in_waiting(self):
+        return len(self.lines) + self.pending()
+
+    def readline(self):
+        """Return the next sample formatted like a line from the Nano, b'' when there is none"""
+        if not self.lines:
+            timestamps, values = self.read_batch()
+            self.lines.extend(zip(timestamps.tolist(), (
+                (','.join(str(v) for v in row) + '\r\n').encode('utf-8') for row in values.tolist())))
+        if not self.lines:
+            return b''
+        self.last_time, line = self.lines.popleft()
+        return line
+
+    def clock(self):
+        """Timestamp in seconds of the last sample read by readline()"""
+        return time.time() if self.last_time is None else self.last_time
+
+    def close(self):
+        pass
+
+
+class SerialSource(SampleSource):
+    def __init__(self, port='/dev/ttyUSB0', baud_rate=115200, timeout=None):
+        """The Nano itself, samples are stamped with their arrival time"""
+        super().__init__()
+        self.ser = serial.Serial(port, baud_rate, timeout=timeout)
+
+    def read_batch(self):
+        timestamps, rows = [], []
+        while not rows or self.ser.in_waiting:
+            line = self.ser.readline()
+            try:
+                values = [int(x) for x in line.decode('utf-8').strip().split(',')]
+            except ValueError:
+                values = None
+            if values is not None and len(values) == 6:
+                timestamps.append(time.time())
+                rows.append(values)
+            elif not line:
+                break
+        return np.array(timestamps), np.array(rows, dtype=np.int16).reshape(-1, 6)
+
+    def pending(self):
+        return self.ser.in_waiting
+
+    def readline(self):
+        # Pass lines straight through so the tools see exactly what the Nano sends
+        if self.lines:
+            return super().readline()
+        line = self.ser.readline()
+        self.last_time = time.time()
+        return line
+
+    def clock(self):
+        return time.time()
+
+    def close(self):
+        self.ser.close()
+
+
+class BrokerSource(SampleSource):
+    def __init__(self, address, timeout=None):
+        """A SerialBroker subscription, keeping the broker's arrival timestamps"""
+        super().__init__()
+        self.client = BrokerClient(address, timeout)
+
+    def read_batch(self):
+        return self.client.read_batch()
+
+    def pending(self):
+        # A block is waiting when the socket is readable; its size is only known once read
+        readable, _, _ = select.select([self.client.sock], [], [], 0)
+        return 1 if readable else 0
+
+    def close(self):
+        self.client.close()
+
+
+class ReplaySource(SampleSource):
+    # With speed=None a batch stays unavailable for this long after its last
+    # line is read, which ends a `while in_waiting` drain loop after one batch
+    TURNAROUND = 0.001
+
+    def __init__(self, path, speed=1.0, batch_size=32, loop=False, t_start=None, t_end=None, idle=0.1):
+        """
+        Replay a recording (CSV or .imuz) with its original timestamps
+
+        Args:
+            path (str): Recording
+            speed (float): Playback speed, 1 for real time, N for N x, None to
+                deliver batches as fast as they are read
+            batch_size (int): Largest batch returned by read_batch
+            loop (bool): Start over at the end instead of running dry
+            t_start (float): First timestamp to replay
+            t_end (float): Last timestamp to replay
+            idle (float): Seconds readline() waits before returning b'' at the end
+        """
+        super().__init__()
+        self.path = path
+        self.speed = speed or None
+        self.batch_size = batch_size
+        self.loop = loop
+        self.idle = idle
+        self.timestamps, values, self.signal_names = load_recording(path, t_start, t_end)
+        self.values = np.clip(np.rint(values), -32768, 32767).astype(np.int16)
+        self.duration = float(self.timestamps[-1] - self.timestamps[0]) if len(self.timestamps) else 0.0
+        self.position = 0
+        self.offset = 0.0  # added to timestamps on every loop so time keeps increasing
+        self.wall_start = None
+        self.consumed_at = -np.inf  # when readline() took the last line of a batch
+
+    @property
+    def exhausted(self):
+        return self.position >= len(self.timestamps) and not self.loop
+
+    def _next_pass(self):
+        """(position, offset) the next read starts from, wrapping to a new pass when looping"""
+        if self.position < len(self.timestamps) or not self.loop:
+            return self.position, self.offset
+        # The next pass starts one period after this one ends
+        period = float(np.median(np.diff(self.timestamps))) if len(self.timestamps) > 1 else 1.0
+        return 0, self.offset + self.duration + period
+
+    def _due(self, offset):
+        """Index one past the last sample due at the current wall time"""
+        if self.speed is None:
+            return len(self.timestamps)
+        if self.wall_start is None:
+            self.wall_start = time.monotonic()
+        recording_time = self.timestamps[0] + (time.monotonic() - self.wall_start) * self.speed - offset
+        return int(np.searchsorted(self.timestamps, recording_time, side='right'))
+
+    def pending(self):
+        position, offset = self._next_pass()
+        if position >= len(self.timestamps):
+            return 0
+        if self.speed is None:
+            # As fast as possible offers one batch per drain loop, so loops
+            # like test_2.py's still hand control back between batches
+            if self.lines or time.monotonic() - self.consumed_at < self.TURNAROUND:
+                return 0
+            return min(self.batch_size, len(self.timestamps) - position)
+        return max(min(self._due(offset), len(self.timestamps)) - position, 0)
+
+    def read_batch(self):
+        self.position, self.offset = self._next_pass()
+        if self.position >= len(self.timestamps):
+            return np.empty(0), np.empty((0, self.values.shape[1]), dtype=np.int16)
+        if self.speed is not None:
+            self._due(self.offset)  # starts the wall clock on the first read
+            wait = self.wall_start + (self.timestamps[self.position] + self.offset
+                                      - self.timestamps[0]) / self.speed - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+        end = min(max(self._due(self.offset), self.position + 1), self.position + self.batch_size)
+        batch = slice(self.position, end)
+        self.position = end
+        return self.timestamps[batch] + self.offset, self.values[batch]
+
+    def readline(self):
+        line = super().readline()
+        if line and not self.lines:
+            self.consumed_at = time.monotonic()
+        if not line and self.exhausted:
+            self.last_time = float('inf')  # lets duration loops driven by clock() finish
+            time.sleep(self.idle)  # behave like a serial timeout instead of spinning
+        return line
+
+    def clock(self):
+        """Original timestamp of the last sample read, inf once the replay has run dry"""
+        return self.timestamps[0] if self.last_time is None else self.last_time
+
+
+def open_source(port, baud_rate=115200, speed=1.0, timeout=None):
+    """
+    Open a sample source from a port string
+
+        /dev/ttyUSB0, COM3                    the Nano over serial
+        tcp://host:port, unix:///path         a SerialBroker
+        replay:///path/rec.csv?speed=4&loop=1 a recording, speed 0 or 'max' for as fast as possible
+        rec.csv, rec.imuz                     a recording at the given speed
+    """
+    if port.startswith(('tcp://', 'unix://')):
+        return BrokerSource(port, timeout)
+    if port.startswith('replay://'):
+        parts = urlsplit(port)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        if 'speed' in query:
+            speed = None if query['speed'] in ('0', 'max') else float(query['speed'])
+        return ReplaySource(unquote(parts.netloc + parts.path), speed=speed,
+                            loop=query.get('loop', '0') not in ('0', 'false'))
+    if port.endswith(('.csv', '.imuz')):
+        return ReplaySource(port, speed=speed)
+    return SerialSource(port, baud_rate, timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recording and report the delivered rate")
+    parser.add_argument('path', help="Recording (CSV or .imuz) or any open_source port string")
+    parser.add_argument('--speed', type=float, default=0, help="Playback speed, 0 for as fast as possible")
+    args = parser.parse_args()
+
+    source = open_source(args.path, speed=args.speed)
+    wall_start = time.monotonic()
+    count = 0
+    first = None
+    try:
+        while True:
+            timestamps, _ = source.read_batch()
+            if not len(timestamps):
+                break
+            first = timestamps[0] if first is None else first
+            count += len(timestamps)
+            last = timestamps[-1]
+    except KeyboardInterrupt:
+        pass
+    finally:
+        source.close()
+    elapsed = time.monotonic() - wall_start
+    if count:
+        print(f"Replayed {count} samples covering {last - first:.2f} s in {elapsed:.2f} s "
+              f"({count / elapsed:.0f} samples/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import tracemalloc
+import numpy as np
+from scipy import fft as sp_fft
+
+
+def ricker(points, a):
+    """Ricker (Mexican hat) wavelet, identical to the old scipy.signal.ricker"""
+    A = 2 / (np.sqrt(3 * a) * (np.pi ** 0.25))
+    vec = np.arange(0, points) - (points - 1.0) / 2
+    xsq = vec ** 2
+    return A * (1 - xsq / a ** 2) * np.exp(-xsq / (2 * a ** 2))
+
+
+def ricker_cwt_spectra(widths, n, dtype=np.float32):
+    """
+    FFT plan for scipy.signal.cwt(x, ricker, widths) on n-sample windows
+
+    Kernels are truncated to min(10 * width, n) points as scipy.signal.cwt
+    does. Each kernel's spectrum also carries the circular shift that
+    'same' mode applies, so irfft(rfft(x) * spectra)[:, :n] is the CWT
+    for every scale at once.
+
+    Returns:
+        tuple: (spectra (scales, 1, nfft // 2 + 1), nfft)
+    """
+    points = [int(min(10 * width, n)) for width in widths]
+    nfft = sp_fft.next_fast_len(n + max(points) - 1, real=True)
+    frequencies = np.arange(nfft // 2 + 1)
+    spectra = np.empty((len(widths), 1, nfft // 2 + 1), dtype=np.result_type(dtype, np.complex64))
+    for k, (width, length) in enumerate(zip(widths, points)):
+        shift = np.exp(2j * np.pi * frequencies * ((length - 1) // 2) / nfft)
+        spectra[k, 0] = np.fft.rfft(ricker(length, width), nfft) * shift
+    return spectra, nfft
+
+
+def ricker_cwt_matrix(widths, n, dtype=np.float32):
+    """
+    Build M (scales x n x n) such that M @ x == scipy.signal.cwt(x, ricker, widths)
+
+    Each slice is the banded 'same'-mode convolution with that scale's
+    wavelet, truncated to min(10 * width, n) points as scipy.signal.cwt does.
+    Memory grows with n squared, so this only suits short fixed windows
+    batched many at a time; ScalogramCompositor uses ricker_cwt_spectra instead.
+    """
+    matrix = np.zeros((len(widths), n, n), dtype=dtype)
+    rows = np.arange(n)[:, None]
+    cols = np.arange(n)[None, :]
+    for k, width in enumerate(widths):
+        points = int(min(10 * width, n))
+        kernel = ricker(points, width)[::-1]
+        lag = rows + (points - 1) // 2 - cols
+        inside = (lag >= 0) & (lag < points)
+        matrix[k][inside] = kernel[lag[inside]]
+    return matrix
+
+
+class ScalogramCompositor:
+    def __init__(self, widths, buffer_size, n_channels=3, normalize='minmax', dtype=np.float32):
+        """
+        Ricker scalograms and their RGB composite, computed into preallocated buffers
+
+        Args:
+            widths (np.ndarray): CWT widths, as passed to scipy.signal.cwt
+            buffer_size (int): Samples per window
+            n_channels (int): Channels composited (the first 3 become R, G, B)
+            normalize (str): 'minmax' scales each channel to [min, max],
+                'max' divides each channel by its maximum
+            dtype: Floating point type of the CWT and scratch buffers
+        """
+        if normalize not in ('minmax', 'max'):
+            raise ValueError(f"Unknown normalization {normalize!r}")
+        self.normalize = normalize
+        self.spectra, self.nfft = ricker_cwt_spectra(widths, buffer_size, dtype)
+        self.buffer_size = buffer_size
+
+        # Everything update() writes to is allocated here, once
+        shape = (len(widths), buffer_size, n_channels)
+        self.signals = np.zeros((buffer_size, n_channels), dtype=dtype)
+        # FFT work buffers keep time on the last, contiguous axis
+        self.padded = np.zeros((n_channels, self.nfft), dtype=dtype)
+        self.signal_spectrum = np.zeros((n_channels, self.nfft // 2 + 1), dtype=self.spectra.dtype)
+        self.products = np.zeros((len(widths), n_channels, self.nfft // 2 + 1), dtype=self.spectra.dtype)
+        self.cwt = np.zeros((len(widths), n_channels, self.nfft), dtype=dtype)
+        self.magnitude = np.zeros(shape, dtype=dtype)
+        self.normalized = np.zeros(shape, dtype=dtype)
+        self.low = np.zeros(n_channels, dtype=dtype)
+        self.span = np.zeros(n_channels, dtype=dtype)
+        self.rgb = np.zeros((len(widths), buffer_size, 3), dtype=np.uint8)
+        self.tiny = np.finfo(dtype).tiny
+
+    def load(self, buffers):
+        """Copy one sequence (e.g. a deque) per channel into the signal buffer"""
+        for i, buffer in enumerate(buffers):
+            self.signals[:, i] = buffer
+
+    def update(self):
+        """
+        Recompute magnitude, normalized and rgb in place from self.signals
+
+        magnitude[:, :, i] and normalized[:, :, i] are (scales x time) views
+        that can be handed straight to set_array, as can rgb.
+        """
+        # All scales and channels in one FFT convolution, O(n log n) per scale
+        self.padded[:, :self.buffer_size] = self.signals.T
+        np.fft.rfft(self.padded, axis=-1, out=self.signal_spectrum)
+        # Broadcasting over scales makes the ufunc allocate a buffer, one scale at a time does not
+        for spectrum, product in zip(self.spectra, self.products):
+            np.multiply(spectrum, self.signal_spectrum, out=product)
+        np.fft.irfft(self.products, self.nfft, axis=-1, out=self.cwt)
+        np.abs(self.cwt, out=self.cwt)
+        np.copyto(self.magnitude, self.cwt[:, :, :self.buffer_size].transpose(0, 2, 1))
+
+        if self.normalize == 'minmax':
+            self.magnitude.min(axis=(0, 1), out=self.low)
+        else:
+            self.low.fill(0)
+        self.magnitude.max(axis=(0, 1), out=self.span)
+        np.subtract(self.span, self.low, out=self.span)
+        np.maximum(self.span, self.tiny, out=self.span)
+
+        np.subtract(self.magnitude, self.low, out=self.normalized)
+        np.divide(self.normalized, self.span, out=self.normalized)
+        np.multiply(self.normalized[:, :, :3], 255, out=self.rgb, casting='unsafe')
+        return self.rgb
+
+
+def measure_allocations(compositor, frames=100):
+    """
+    Measure Python-visible memory allocated by compositor.update()
+
+    Returns:
+        tuple: (bytes still held after all frames, peak bytes during a frame)
+    """
+    compositor.update()  # warm up any lazily created state
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(frames):
+            compositor.update()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return after - before, peak - before
+
+if __name__ == "__main__":
+    widths = np.arange(1, 31)
+    buffer_size = 500
+    compositor = ScalogramCompositor(widths, buffer_size)
+    compositor.signals[:] = np.random.randn(buffer_size, 3) * 10000
+
+    retained, peak = measure_allocations(compositor)
+    old_frame = len(widths) * buffer_size * 3 * 8 * 3  # rgb_image + abs and normalized copies
+    print(f"Retained after 100 frames: {retained} bytes")
+    print(f"Peak per frame: {peak} bytes (old update_scalograms: ~{old_frame} bytes)")
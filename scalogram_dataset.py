@@ -0,0 +1,220 @@
+import os
+import csv
+import json
+import queue
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from imu_archive import load_recording
+from resampler import resample
+from scalogram_compositor import ricker_cwt_matrix
+
+# Samples are divided by full scale before the CWT so float16 magnitudes stay in range
+FULL_SCALE = 32768.0
+
+# Dataset layout:
+#   <output>/index.json          parameters, label names and the shard list
+#   <output>/windows.csv         shard, row, recording, start sample, start time, label
+#   <output>/shard_<n>.npy       float16 (windows, channels, scales, window)
+#   <output>/labels_<n>.npy      int64 (windows,)
+
+
+def _load(path, rate):
+    timestamps, data, signal_names = load_recording(path)
+    if rate:
+        timestamps, data, _ = resample(timestamps, data, rate)
+    return timestamps, data / FULL_SCALE, signal_names
+
+
+_worker = {}
+
+
+def _init_worker(widths, window, rate, channels):
+    _worker.update(matrix=ricker_cwt_matrix(widths, window), window=window, rate=rate,
+                   channels=channels, recordings={})
+
+
+def _write_shard(folder, shard, entries, batch_size=256):
+    """Compute the scalograms of one shard's windows and save them"""
+    window, matrix = _worker['window'], _worker['matrix']
+    recordings = _worker['recordings']
+    out = np.empty((len(entries), len(_worker['channels']), matrix.shape[0], window), dtype=np.float16)
+    for first in range(0, len(entries), batch_size):
+        batch = entries[first:first + batch_size]
+        signals = np.empty((len(batch), window, len(_worker['channels'])), dtype=np.float32)
+        for row, (path, start, _) in enumerate(batch):
+            if path not in recordings:
+                recordings.clear()  # entries are grouped by recording, keep one at a time
+                _, data, signal_names = _load(path, _worker['rate'])
+                recordings[path] = data[:, [signal_names.index(c) for c in _worker['channels']]]
+            signals[row] = recordings[path][start:start + window]
+        # (scales, n, n) @ (batch, 1, n, channels) -> (batch, scales, n, channels)
+        magnitude = np.abs(np.matmul(matrix, signals[:, None]))
+        out[first:first + len(batch)] = magnitude.transpose(0, 3, 1, 2)
+    np.save(os.path.join(folder, f"shard_{shard:05d}.npy"), out)
+    np.save(os.path.join(folder, f"labels_{shard:05d}.npy"),
+            np.array([label for _, _, label in entries], dtype=np.int64))
+    return shard, len(entries)
+
+
+def export_dataset(paths, output, window=50, stride=25, widths=np.arange(1, 31), channels=None,
+                   labels=None, rate=None, shard_size=1024, workers=None):
+    """
+    Slide a window over many recordings and write scalogram shards in parallel
+
+    Args:
+        paths (list): Recordings (CSV or .imuz)
+        output (str): Dataset folder
+        window (int): Samples per window (RealtimeRGBScalogram's buffer_size)
+        stride (int): Samples between window starts
+        widths (np.ndarray): Ricker CWT widths, as in the live viewers
+        channels (list): Signal names to include, all six if None
+        labels (dict): Label per recording path or file name, parent folder name if missing
+        rate (float): Resample every recording to this rate first (see resampler.py)
+        shard_size (int): Windows per shard (the last shard may be smaller)
+        workers (int): Worker processes, one per CPU if None
+    """
+    os.makedirs(output, exist_ok=True)
+    labels = labels or {}
+    entries, rows = [], []
+    for path in paths:
+        timestamps, _, signal_names = _load(path, rate)
+        channels = channels or signal_names
+        label = labels.get(path, labels.get(os.path.basename(path),
+                                            os.path.basename(os.path.dirname(os.path.abspath(path)))))
+        for start in range(0, len(timestamps) - window + 1, stride):
+            entries.append((path, start, label))
+            rows.append(float(timestamps[start]))
+
+    label_names = sorted({label for _, _, label in entries})
+    label_index = {name: i for i, name in enumerate(label_names)}
+    entries = [(path, start, label_index[label]) for path, start, label in entries]
+    shards = [entries[i:i + shard_size] for i in range(0, len(entries), shard_size)]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(np.asarray(widths), window, rate, channels)) as pool:
+        futures = [pool.submit(_write_shard, output, shard, part) for shard, part in enumerate(shards)]
+        for future in futures:
+            shard, count = future.result()
+            print(f"Shard {shard + 1}/{len(shards)}: {count} windows")
+
+    with open(os.path.join(output, 'windows.csv'), 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['shard', 'row', 'recording', 'start_sample', 'start_time', 'label'])
+        for i, ((path, start, label), start_time) in enumerate(zip(entries, rows)):
+            writer.writerow([i // shard_size, i % shard_size, path, start, f"{start_time:.3f}",
+                             label_names[label]])
+
+    with open(os.path.join(output, 'index.json'), 'w') as file:
+        json.dump({
+            'window': window,
+            'stride': stride,
+            'widths': np.asarray(widths).tolist(),
+            'channels': channels,
+            'rate': rate,
+            'full_scale': FULL_SCALE,
+            'label_names': label_names,
+            'shard_size': shard_size,
+            'shards': [{'data': f"shard_{i:05d}.npy", 'labels': f"labels_{i:05d}.npy",
+                        'count': len(part)} for i, part in enumerate(shards)],
+        }, file, indent=2)
+    return output
+
+
+class ScalogramShardReader:
+    def __init__(self, folder, batch_size=64, shuffle=False, prefetch=4, seed=None):
+        """
+        Stream (scalograms, labels) batches from an exported dataset
+
+        Shards are memory-mapped and a background thread reads ahead up to
+        `prefetch` batches, so training never waits on the disk.
+
+        Args:
+            folder (str): Dataset folder written by export_dataset
+            batch_size (int): Windows per batch
+            shuffle (bool): Shuffle shard order and windows within each shard
+            prefetch (int): Batches read ahead
+            seed (int): Random seed for shuffling
+        """
+        self.folder = folder
+        with open(os.path.join(folder, 'index.json')) as file:
+            self.index = json.load(file)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.prefetch = prefetch
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return sum(shard['count'] for shard in self.index['shards'])
+
+    @staticmethod
+    def _put(batches, item, stop):
+        """Queue an item unless the consumer has gone away, returns False if it has"""
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _produce(self, batches, stop):
+        try:
+            order = self.rng.permutation(len(self.index['shards'])) if self.shuffle \
+                else range(len(self.index['shards']))
+            for i in order:
+                shard = self.index['shards'][i]
+                data = np.load(os.path.join(self.folder, shard['data']), mmap_mode='r')
+                labels = np.load(os.path.join(self.folder, shard['labels']), mmap_mode='r')
+                rows = self.rng.permutation(shard['count']) if self.shuffle else np.arange(shard['count'])
+                for first in range(0, len(rows), self.batch_size):
+                    picked = np.sort(rows[first:first + self.batch_size])
+                    batch = (np.asarray(data[picked]), np.asarray(labels[picked]))
+                    if not self._put(batches, batch, stop):
+                        return
+        except Exception as error:
+            # Hand the failure to the consumer instead of ending the epoch early
+            self._put(batches, error, stop)
+            return
+        self._put(batches, None, stop)
+
+    def __iter__(self):
+        batches = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        thread = threading.Thread(target=self._produce, args=(batches, stop), daemon=True)
+        thread.start()
+        try:
+            while True:
+                batch = batches.get()
+                if batch is None:
+                    return
+                if isinstance(batch, Exception):
+                    raise batch
+                yield batch
+        finally:
+            stop.set()
+            thread.join()
+
+def main():
+    parser = argparse.ArgumentParser(description="Export windowed scalogram shards for ML training")
+    parser.add_argument('paths', nargs='+', help="Recordings (CSV or .imuz)")
+    parser.add_argument('--output', default='scalogram_dataset')
+    parser.add_argument('--window', type=int, default=50)
+    parser.add_argument('--stride', type=int, default=25)
+    parser.add_argument('--rate', type=float, default=None, help="Resample to this rate first")
+    parser.add_argument('--labels', default=None, help="JSON file mapping recording name to label")
+    parser.add_argument('--shard-size', type=int, default=1024)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    labels = None
+    if args.labels:
+        with open(args.labels) as file:
+            labels = json.load(file)
+    export_dataset(args.paths, args.output, args.window, args.stride, labels=labels, rate=args.rate,
+                   shard_size=args.shard_size, workers=args.workers)
+    print(f"Dataset written to: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import os
+import json
+import argparse
+from functools import lru_cache
+import numpy as np
+import matplotlib.pyplot as plt
+from imu_archive import load_recording
+from tiled_cwt import tiled_cwt
+
+# Pyramid layout on disk:
+#   <name>.pyramid/meta.json
+#   <name>.pyramid/times.npy                    original timestamps (level 0 columns)
+#   <name>.pyramid/L<level>/<channel>_<tile>.npy  float16 magnitudes of the [-1, 1]
+#                                                 normalized signal (rows x tile_width)
+#   <name>.pyramid/L<level>/envelope_<channel>.npy  float32 (2 x columns) min/max of the raw signal
+
+
+def _reduce(magnitude, factor, scale_step):
+    """Max-pool time by factor (keeps transients) and average scale_step rows together"""
+    rows, columns = magnitude.shape
+    columns -= columns % factor
+    pooled = magnitude[:, :columns].reshape(rows, -1, factor).max(axis=2)
+    if scale_step > 1:
+        rows -= rows % scale_step
+        pooled = pooled[:rows].reshape(-1, scale_step, pooled.shape[1]).mean(axis=1)
+    return pooled
+
+
+def build_pyramid(path, output=None, channels=None, scales=np.arange(1, 128, 0.1), wavelet='morl',
+                  tile_width=512, factor=4, min_rows=160, max_levels=None,
+                  memory_budget=512 * 2**20, workers=4):
+    """
+    Precompute a tiled multi-resolution scalogram pyramid of a recording
+
+    Args:
+        path (str): Recording (CSV or .imuz)
+        output (str): Pyramid folder, defaults to <recording>.pyramid
+        channels (list): Signal names to include, all if None
+        scales (np.ndarray): CWT scales, eda_test.py's by default
+        wavelet (str): Continuous wavelet name
+        tile_width (int): Columns per tile at every level
+        factor (int): Time decimation between consecutive levels
+        min_rows (int): Scale rows are halved per level down to this many
+        max_levels (int): Stop after this many levels
+        memory_budget (int): Working memory for the level 0 CWT, see tiled_cwt
+        workers (int): Worker processes for the level 0 CWT
+    """
+    timestamps, data, signal_names = load_recording(path)
+    output = output or os.path.splitext(path)[0] + '.pyramid'
+    channels = channels or signal_names
+    os.makedirs(output, exist_ok=True)
+    np.save(os.path.join(output, 'times.npy'), timestamps)
+
+    n = len(timestamps)
+    levels = []
+    columns, rows, step, level = n, len(scales), 1, 0
+    while True:
+        levels.append({'level': level, 'samples_per_column': step, 'columns': columns,
+                       'rows': rows, 'tiles': -(-columns // tile_width)})
+        if columns <= tile_width or (max_levels and len(levels) >= max_levels):
+            break
+        scale_step = 2 if rows // 2 >= min_rows else 1
+        columns, rows, step, level = columns // factor, rows // scale_step, step * factor, level + 1
+    for entry in levels:
+        os.makedirs(os.path.join(output, f"L{entry['level']}"), exist_ok=True)
+
+    vmax = {}
+    for name in channels:
+        raw = data[:, signal_names.index(name)].astype(np.float64)
+        vmax[name] = 0.0
+
+        # Normalize to [-1, 1] as eda_test.py does, which also keeps float16 tiles in range
+        low, high = raw.min(), raw.max()
+        signal = (raw - low) / max(high - low, 1e-12) * 2 - 1
+
+        # Level 0: out-of-core CWT, then cut into tiles
+        scratch = os.path.join(output, f"{name}_cwt.npy")
+        magnitude, _ = tiled_cwt(signal, scales, wavelet, scratch, memory_budget, workers)
+        for tile in range(levels[0]['tiles']):
+            part = magnitude[:, tile * tile_width:(tile + 1) * tile_width]
+            vmax[name] = max(vmax[name], float(part.max()))
+            np.save(os.path.join(output, 'L0', f"{name}_{tile:06d}.npy"), part.astype(np.float16))
+        del magnitude
+        os.remove(scratch)
+        envelope = np.vstack([raw, raw]).astype(np.float32)
+        np.save(os.path.join(output, 'L0', f"envelope_{name}.npy"), envelope)
+
+        # Higher levels: reduce groups of `factor` tiles of the level below
+        for below, entry in zip(levels, levels[1:]):
+            scale_step = below['rows'] // entry['rows']
+            for tile in range(entry['tiles']):
+                parts = [np.load(os.path.join(output, f"L{below['level']}", f"{name}_{k:06d}.npy"))
+                         for k in range(tile * factor, min(below['tiles'], (tile + 1) * factor))]
+                reduced = _reduce(np.hstack(parts).astype(np.float32), factor, scale_step)
+                np.save(os.path.join(output, f"L{entry['level']}", f"{name}_{tile:06d}.npy"),
+                        reduced.astype(np.float16))
+            used = entry['columns'] * factor
+            envelope = np.vstack([
+                envelope[0, :used].reshape(-1, factor).min(axis=1),
+                envelope[1, :used].reshape(-1, factor).max(axis=1),
+            ])
+            np.save(os.path.join(output, f"L{entry['level']}", f"envelope_{name}.npy"), envelope)
+        print(f"{name}: {len(levels)} levels written")
+
+    with open(os.path.join(output, 'meta.json'), 'w') as file:
+        json.dump({
+            'source': os.path.abspath(path),
+            'channels': channels,
+            'scales': np.asarray(scales).tolist(),
+            'wavelet': wavelet,
+            'tile_width': tile_width,
+            'factor': factor,
+            'levels': levels,
+            'vmax': vmax,
+        }, file, indent=2)
+    return output
+
+
+class ScalogramPyramid:
+    def __init__(self, folder):
+        """Read-only access to a pyramid written by build_pyramid"""
+        self.folder = folder
+        with open(os.path.join(folder, 'meta.json')) as file:
+            self.meta = json.load(file)
+        self.levels = self.meta['levels']
+        self.tile_width = self.meta['tile_width']
+        self.times = np.load(os.path.join(folder, 'times.npy'), mmap_mode='r')
+        self.tile = lru_cache(maxsize=256)(self._load_tile)
+
+    def _load_tile(self, level, channel, index):
+        return np.load(os.path.join(self.folder, f"L{level}", f"{channel}_{index:06d}.npy"),
+                       mmap_mode='r')
+
+    def choose_level(self, start, stop, max_columns):
+        """Finest level showing samples [start, stop) in at most max_columns columns"""
+        for entry in self.levels:
+            if (stop - start) / entry['samples_per_column'] <= max_columns:
+                return entry
+        return self.levels[-1]
+
+    def fetch(self, channel, start, stop, max_columns=2000):
+        """
+        Magnitudes and envelope covering samples [start, stop), read from the
+        few tiles that overlap the viewport only
+
+        Returns:
+            tuple: (level entry, first sample, magnitude (rows x columns), envelope (2 x columns))
+        """
+        entry = self.choose_level(start, stop, max_columns)
+        step = entry['samples_per_column']
+        first = max(0, start // step)
+        last = min(entry['columns'], -(-stop // step))
+        tiles = range(first // self.tile_width, max(first, last - 1) // self.tile_width + 1)
+        magnitude = np.hstack([self.tile(entry['level'], channel, k) for k in tiles])
+        offset = tiles[0] * self.tile_width
+        magnitude = magnitude[:, first - offset:last - offset]
+        envelope = np.load(os.path.join(self.folder, f"L{entry['level']}", f"envelope_{channel}.npy"),
+                           mmap_mode='r')[:, first:last]
+        return entry, first * step, magnitude, envelope
+
+
+class PyramidViewer:
+    def __init__(self, folder, channel=None, max_columns=2000):
+        """
+        Interactive pan/zoom viewer that only loads the tiles in view
+
+        Args:
+            folder (str): Pyramid folder written by build_pyramid
+            channel (str): Signal name to show, the first in the pyramid if None
+            max_columns (int): Columns drawn at most, roughly the axis width in pixels
+        """
+        self.pyramid = ScalogramPyramid(folder)
+        self.channel = channel or self.pyramid.meta['channels'][0]
+        self.max_columns = max_columns
+        self.times = np.asarray(self.pyramid.times)
+        scales = self.pyramid.meta['scales']
+
+        self.fig, (self.ax_signal, self.ax_scalogram) = plt.subplots(2, 1, sharex=True, figsize=(12, 8))
+        self.envelope = None
+        self.ax_signal.set_title(f'IMU Data - {self.channel}')
+        self.ax_signal.set_ylabel('Magnitude')
+        self.image = self.ax_scalogram.imshow(
+            np.zeros((2, 2)), aspect='auto', origin='lower', cmap='Reds',
+            vmin=0, vmax=self.pyramid.meta['vmax'][self.channel],
+            extent=(self.times[0], self.times[-1], scales[0], scales[-1]))
+        self.ax_scalogram.set_xlabel('Time (s)')
+        self.ax_scalogram.set_ylabel('Scale')
+        self.ax_scalogram.set_title(f'Scalogram of {self.channel}')
+        self.ax_scalogram.set_xlim(self.times[0], self.times[-1])
+        self.ax_scalogram.callbacks.connect('xlim_changed', self.refresh)
+        self.refresh(self.ax_scalogram)
+        plt.tight_layout()
+
+    def refresh(self, ax):
+        """Reload the tiles covering the current x-limits"""
+        t_min, t_max = ax.get_xlim()
+        start = max(0, int(np.searchsorted(self.times, t_min)) - 1)
+        stop = min(len(self.times), int(np.searchsorted(self.times, t_max)) + 1)
+        if stop - start < 2:
+            return
+        entry, first, magnitude, envelope = self.pyramid.fetch(self.channel, start, stop, self.max_columns)
+        if magnitude.shape[1] == 0:
+            return
+
+        step = entry['samples_per_column']
+        column_times = self.times[np.minimum(first + np.arange(magnitude.shape[1] + 1) * step,
+                                             len(self.times) - 1)]
+        scales = self.pyramid.meta['scales']
+        self.image.set_data(np.asarray(magnitude, dtype=np.float32))
+        self.image.set_extent((column_times[0], column_times[-1], scales[0], scales[-1]))
+
+        if self.envelope is not None:
+            self.envelope.remove()
+        self.envelope = self.ax_signal.fill_between(
+            column_times[:-1], envelope[0], envelope[1], step='post', color='tab:blue', linewidth=0.5)
+        self.ax_signal.set_ylim(float(np.min(envelope[0])), float(np.max(envelope[1])) + 1)
+        self.ax_signal.set_title(f"IMU Data - {self.channel} (level {entry['level']})")
+        self.fig.canvas.draw_idle()
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or browse multi-resolution scalogram pyramids")
+    parser.add_argument('path', help="Recording to index, or an existing .pyramid folder to view")
+    parser.add_argument('--channel', default=None, help="Signal to show, e.g. X-Accel")
+    parser.add_argument('--channels', nargs='*', default=['X-Accel', 'Y-Accel', 'Z-Accel'],
+                        help="Signals to include when building")
+    args = parser.parse_args()
+
+    folder = args.path
+    if not os.path.isdir(folder):
+        folder = build_pyramid(args.path, channels=args.channels)
+    PyramidViewer(folder, channel=args.channel)
+    plt.show()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import os
+import time
+import queue
+import socket
+import struct
+import argparse
+import threading
+import numpy as np
+import serial
+
+# Every block is BLOCK_HEADER followed by float64 timestamps (n) and
+# int16 samples (n x channels, row-major) in the order the Nano sends them.
+BLOCK_MAGIC = b'IMUB'
+BLOCK_HEADER = struct.Struct('<4sHH')
+DEFAULT_ADDRESS = 'tcp://127.0.0.1:5760'
+
+
+def parse_address(address):
+    """Split 'tcp://host:port' or 'unix:///path' into (family, sockaddr)"""
+    if address.startswith('unix://'):
+        return socket.AF_UNIX, address[len('unix://'):]
+    if address.startswith('tcp://'):
+        host, _, port = address[len('tcp://'):].rpartition(':')
+        return socket.AF_INET, (host or '127.0.0.1', int(port))
+    raise ValueError(f"Unsupported broker address {address!r}")
+
+
+def pack_block(timestamps, values):
+    values = np.clip(np.asarray(values), -32768, 32767).astype('<i2')
+    return (BLOCK_HEADER.pack(BLOCK_MAGIC, len(timestamps), values.shape[1]) +
+            np.asarray(timestamps, dtype='<f8').tobytes() + values.tobytes())
+
+
+def _recv_exactly(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if n == 0:
+            raise ConnectionError("Broker closed the connection")
+        received += n
+    return bytes(buffer)
+
+
+class Subscriber:
+    def __init__(self, sock, queue_size):
+        """One connected viewer with its own bounded queue and sender thread"""
+        self.sock = sock
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.alive = True
+        self.thread = threading.Thread(target=self._send_loop, daemon=True)
+        self.thread.start()
+
+    def publish(self, block):
+        """Queue a block without ever blocking; a full queue drops its oldest block"""
+        while True:
+            try:
+                self.queue.put_nowait(block)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def _send_loop(self):
+        try:
+            while self.alive:
+                block = self.queue.get()
+                if block is None:
+                    break
+                self.sock.sendall(block)
+        except OSError:
+            pass
+        finally:
+            self.alive = False
+            self.sock.close()
+
+    def close(self):
+        self.alive = False
+        self.publish(None)
+
+
+class SerialBroker:
+    def __init__(self, port='/dev/ttyUSB0', baud_rate=115200, address=DEFAULT_ADDRESS,
+                 batch_size=32, batch_interval=0.05, queue_size=64):
+        """
+        Own the serial port and fan parsed samples out to local subscribers
+
+        Args:
+            port (str): Serial port
+            baud_rate (int): Baud rate
+            address (str): 'tcp://host:port' or 'unix:///path/to/socket'
+            batch_size (int): Samples per published block
+            batch_interval (float): Publish a partial block after this many seconds
+            queue_size (int): Blocks buffered per subscriber before dropping
+        """
+        self.port = port
+        self.baud_rate = baud_rate
+        self.address = address
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.queue_size = queue_size
+        self.subscribers = []
+        self.lock = threading.Lock()
+
+    def _accept_loop(self, server):
+        while True:
+            try:
+                sock, _ = server.accept()
+            except OSError:
+                return
+            with self.lock:
+                self.subscribers.append(Subscriber(sock, self.queue_size))
+            print(f"Subscriber connected ({len(self.subscribers)} total)")
+
+    def publish(self, timestamps, values):
+        block = pack_block(timestamps, values)
+        with self.lock:
+            self.subscribers = [s for s in self.subscribers if s.alive]
+            for subscriber in self.subscribers:
+                subscriber.publish(block)
+
+    def run(self):
+        """Read and parse frames once, publishing them in batches"""
+        family, sockaddr = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(sockaddr):
+            os.unlink(sockaddr)
+        server = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(sockaddr)
+        server.listen()
+        threading.Thread(target=self._accept_loop, args=(server,), daemon=True).start()
+
+        ser = serial.Serial(self.port, self.baud_rate, timeout=self.batch_interval)
+        print(f"Broadcasting {self.port} on {self.address}")
+
+        timestamps, rows = [], []
+        partial = b''
+        last_publish = time.time()
+        try:
+            while True:
+                # readline() gives up after batch_interval with whatever arrived,
+                # so keep a cut-off line until its newline comes in
+                partial += ser.readline()
+                values = None
+                if partial.endswith(b'\n'):
+                    line, partial = partial, b''
+                    try:
+                        values = [int(x) for x in line.decode('utf-8').strip().split(',')]
+                    except ValueError:
+                        values = None
+                if values is not None and len(values) == 6:
+                    timestamps.append(time.time())
+                    rows.append(values)
+
+                now = time.time()
+                if rows and (len(rows) >= self.batch_size or now - last_publish >= self.batch_interval):
+                    self.publish(timestamps, rows)
+                    timestamps, rows = [], []
+                    last_publish = now
+        except KeyboardInterrupt:
+            print("Stopping broker...")
+        finally:
+            ser.close()
+            server.close()
+            with self.lock:
+                for subscriber in self.subscribers:
+                    subscriber.close()
+            if family == socket.AF_UNIX and os.path.exists(sockaddr):
+                os.unlink(sockaddr)
+
+
+class BrokerClient:
+    def __init__(self, address=DEFAULT_ADDRESS, timeout=None):
+        """
+        Subscribe to a SerialBroker
+
+        The viewers and loggers read it through sample_source.BrokerSource,
+        which adds the readline() interface of serial.Serial.
+        """
+        family, sockaddr = parse_address(address)
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(sockaddr)
+
+    def read_batch(self):
+        """Block until the next sample block arrives, returns (timestamps, int16 values)"""
+        magic, n_samples, n_channels = BLOCK_HEADER.unpack(_recv_exactly(self.sock, BLOCK_HEADER.size))
+        if magic != BLOCK_MAGIC:
+            raise ConnectionError("Lost framing on broker stream")
+        timestamps = np.frombuffer(_recv_exactly(self.sock, 8 * n_samples), dtype='<f8')
+        values = np.frombuffer(_recv_exactly(self.sock, 2 * n_samples * n_channels), dtype='<i2')
+        return timestamps, values.reshape(n_samples, n_channels)
+
+    def close(self):
+        self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Share one serial port with several viewers")
+    parser.add_argument('--port', default='/dev/ttyUSB0', help="Arduino serial port")
+    parser.add_argument('--baud-rate', type=int, default=115200)
+    parser.add_argument('--address', default=DEFAULT_ADDRESS, help="tcp://host:port or unix:///path")
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+
+    broker = SerialBroker(args.port, args.baud_rate, args.address, batch_size=args.batch_size)
+    broker.run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import numpy as np
+
+
+class StreamingWelch:
+    def __init__(self, fs, nperseg=64, noverlap=None, n_channels=6, average=16, waterfall_length=100):
+        """
+        Running Welch PSD and STFT history, updated as samples arrive
+
+        Args:
+            fs (float): Sampling rate in Hz
+            nperseg (int): Samples per FFT segment
+            noverlap (int): Overlap between segments, defaults to nperseg // 2
+            n_channels (int): Number of channels transformed together
+            average (int): Number of most recent segments in the Welch average
+            waterfall_length (int): Number of STFT columns kept for the waterfall
+        """
+        self.fs = fs
+        self.nperseg = nperseg
+        self.hop = nperseg - (nperseg // 2 if noverlap is None else noverlap)
+        self.n_channels = n_channels
+        self.average = average
+
+        # Periodic Hann window and density scaling, as scipy.signal.welch uses
+        self.window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(nperseg) / nperseg)
+        self.scale = np.full(nperseg // 2 + 1, 1.0 / (fs * np.sum(self.window ** 2)))
+        self.scale[1:(nperseg + 1) // 2] *= 2  # one-sided: fold negative frequencies
+        self.freqs = np.fft.rfftfreq(nperseg, 1.0 / fs)
+        self.offsets = np.arange(nperseg)
+
+        n_freqs = len(self.freqs)
+        self.carry = np.empty((n_channels, 0))
+        self.history = np.zeros((average, n_channels, n_freqs))
+        self.history_sum = np.zeros((n_channels, n_freqs))
+        self.history_index = 0
+        self.segments = 0
+        self.psd = np.zeros((n_channels, n_freqs))
+        self.waterfall = np.full((n_channels, n_freqs, waterfall_length), -np.inf)
+
+    def update(self, samples):
+        """
+        Add samples shaped (n, channels) and transform only the new segments
+
+        Returns:
+            int: Number of new segments (0 means psd/waterfall are unchanged)
+        """
+        samples = np.asarray(samples, dtype=np.float64).reshape(-1, self.n_channels)
+        data = np.concatenate([self.carry, samples.T], axis=1)
+        starts = np.arange(0, data.shape[1] - self.nperseg + 1, self.hop)
+        if len(starts) == 0:
+            self.carry = data
+            return 0
+
+        # (channels, segments, nperseg) view of all new segments, one FFT call
+        segments = data[:, starts[:, None] + self.offsets]
+        segments = segments - segments.mean(axis=-1, keepdims=True)
+        spectra = np.fft.rfft(segments * self.window, axis=-1)
+        power = (spectra.real ** 2 + spectra.imag ** 2) * self.scale
+        self.carry = data[:, starts[-1] + self.hop:]
+
+        for k in range(power.shape[1]):
+            slot = self.history_index
+            self.history_sum += power[:, k] - self.history[slot]
+            self.history[slot] = power[:, k]
+            self.history_index = (slot + 1) % self.average
+        self.segments += power.shape[1]
+        self.psd = self.history_sum / min(self.segments, self.average)
+
+        # Scroll the waterfall left and append the new columns in dB
+        new = min(power.shape[1], self.waterfall.shape[2])
+        self.waterfall[:, :, :-new] = self.waterfall[:, :, new:]
+        self.waterfall[:, :, -new:] = 10 * np.log10(
+            np.maximum(power[:, -new:].transpose(0, 2, 1), 1e-12))
+        return power.shape[1]
+
+
+class SpectralPanel:
+    def __init__(self, ax_psd, ax_waterfall, fs, signal_names, channel=0, **welch_kwargs):
+        """
+        Live Welch PSD of all channels plus an STFT waterfall of one channel
+
+        Args:
+            ax_psd: Matplotlib axis for the PSD lines
+            ax_waterfall: Matplotlib axis for the waterfall image
+            fs (float): Sampling rate in Hz
+            signal_names (list): Channel names, in column order
+            channel (int): Channel shown in the waterfall
+        """
+        self.welch = StreamingWelch(fs, n_channels=len(signal_names), **welch_kwargs)
+        self.signal_names = signal_names
+        self.channel = channel
+        self.ax_psd = ax_psd
+        self.ax_waterfall = ax_waterfall
+
+        zeros = np.full_like(self.welch.freqs, np.nan)
+        self.lines = [ax_psd.semilogy(self.welch.freqs, zeros, label=name, alpha=0.8)[0]
+                      for name in signal_names]
+        ax_psd.set_xlim(0, fs / 2)
+        ax_psd.set_title('Welch PSD')
+        ax_psd.set_xlabel('Frequency (Hz)')
+        ax_psd.set_ylabel('PSD')
+        ax_psd.grid(True)
+        ax_psd.legend(loc='upper right', fontsize='small')
+
+        history = self.welch.waterfall.shape[2] * self.welch.hop / fs
+        self.waterfall_plot = ax_waterfall.imshow(
+            np.zeros(self.welch.waterfall.shape[1:]),
+            aspect='auto',
+            origin='lower',
+            cmap='inferno',
+            extent=[-history, 0, 0, fs / 2]
+        )
+        ax_waterfall.set_xlabel('Time (s)')
+        ax_waterfall.set_ylabel('Frequency (Hz)')
+        self.set_channel(channel)
+
+    def set_channel(self, index):
+        """Change which channel the waterfall shows"""
+        self.channel = index
+        self.ax_waterfall.set_title(f'STFT - {self.signal_names[index]}')
+
+    def update(self, samples):
+        """Feed samples shaped (n, channels) and refresh the artists if a segment completed"""
+        if not self.welch.update(samples):
+            return False
+
+        psd = self.welch.psd
+        for line, channel_psd in zip(self.lines, psd):
+            line.set_ydata(channel_psd)
+        positive = psd[psd > 0]
+        if positive.size:
+            self.ax_psd.set_ylim(positive.min(), positive.max() * 2)
+
+        image = self.welch.waterfall[self.channel]
+        finite = image[np.isfinite(image)]
+        self.waterfall_plot.set_array(np.where(np.isfinite(image), image, finite.min()))
+        self.waterfall_plot.set_clim(finite.min(), finite.max())
+        return True
@@ -1,86 +1,103 @@
-import serial
+from sample_source import open_source
 import numpy as np
 import pywt
-from collections import deque
 from PyQt5 import QtWidgets
 import pyqtgraph as pg
-from collections import deque
+from pg_scalogram import ScalogramImage
 
 
 # Serial port configuration
 port = '/dev/ttyUSB0'  # Replace 'COM3' with your Arduino's port
 baud_rate = 115200
-ser = serial.Serial(port, baud_rate)
+ser = open_source(port, baud_rate)
 
-# Initialize data deque for faster appending and popping
+# Initialize fixed-size data buffers (one row per signal), shifted in place
 window_size = 1  # seconds
 sampling_rate = 100  # Hz
 maxlen = int(window_size * sampling_rate)
-
-x_data = deque(maxlen=maxlen)
+signal_names = ['X-Gyro', 'Y-Gyro', 'Z-Gyro', 'X-Accel', 'Y-Accel', 'Z-Accel']
+data_buffer = np.zeros((len(signal_names), maxlen))
+sample_count = 0
+widths = np.arange(1, 50)  # Adjust range as needed
+time_axis = np.arange(maxlen) / sampling_rate
 
 # Create PyQt application
 app = QtWidgets.QApplication([])
 
 # Create a window
 win = pg.GraphicsLayoutWidget(show=True, title="Real-time Data Plot")
-win.resize(1000, 600)
+win.resize(1200, 800)
 win.setWindowTitle('PyQtGraph Real-time Plot')
 
 # Enable anti-aliasing for prettier plots
 pg.setConfigOptions(antialias=True)
 
 # Time-domain plot
-p1 = win.addPlot(title="Time-domain Data")
+p1 = win.addPlot(title="Time-domain Data", colspan=3)
 p1.setLabel('bottom', 'Time', 's')
-p1.setLabel('left', 'Acceleration', 'm/s^2')
-curve1 = p1.plot(pen='y')
-
-# Scalogram plot
-win.nextRow()
-p2 = win.addPlot(title="Scalogram")
-p2.setLabel('bottom', 'Time', 's')
-p2.setLabel('left', 'Scale', 'Hz')
-img = pg.ImageItem()
-p2.addItem(img)
+p1.setLabel('left', 'Magnitude')
+p1.addLegend()
+curves = [p1.plot(pen=pg.intColor(i, len(signal_names)), name=name) for i, name in enumerate(signal_names)]
+
+# Scalogram plots, one per signal, each rendered through a persistent uint8 buffer
+scalograms = []
+for i, name in enumerate(signal_names):
+    if i % 3 == 0:
+        win.nextRow()
+    plot = win.addPlot(title=f"Scalogram - {name}")
+    plot.setLabel('bottom', 'Time', 's')
+    plot.setLabel('left', 'Scale')
+    img = pg.ImageItem(axisOrder='row-major')
+    img.setRect(0, widths[0], window_size, widths[-1] - widths[0])
+    plot.addItem(img)
+    scalograms.append(ScalogramImage(img, len(widths), maxlen))
+
+def read_samples():
+    """Read every line already waiting on the port into the data buffer, without blocking"""
+    global sample_count
+    while ser.in_waiting:
+        line = ser.readline().decode().strip()
+
+        # Check if line is empty
+        if not line:
+            return
+
+        # Parse data
+        try:
+            data = [float(x) for x in line.split(',')]
+        except ValueError:
+            print("Error parsing data:", line)
+            data = []
+        if len(data) == len(signal_names):
+            data_buffer[:, :-1] = data_buffer[:, 1:]
+            data_buffer[:, -1] = data
+            sample_count += 1
+
+drawn_count = 0
 
 def update_plot():
-    # Read data from Arduino
-    line = ser.readline().decode().strip()
-
-    # Check if line is empty
-    if not line:
-        return
-
-    # Parse data
-    try:
-        data = [float(x) for x in line.split(',')]
-    except ValueError:
-        print("Error parsing data:", line)
+    global drawn_count
+    read_samples()
+    # Nothing new arrived since the last tick, so the plots are still current
+    if sample_count == drawn_count:
         return
-
-    # Update data deque
-    x_acc = data[0]
-    x_data.append(x_acc)
+    drawn_count = sample_count
 
     # Update time-domain plot
-    curve1.setData(np.arange(len(x_data)) / sampling_rate, x_data)
+    for curve, row in zip(curves, data_buffer):
+        curve.setData(time_axis, row)
 
-    # Calculate the scalogram
-    widths = np.arange(1, 50)  # Adjust range as needed
-    coefficients, frequencies = pywt.cwt(x_data, widths, 'morl', sampling_period=1 / sampling_rate)
-        
-    scalogram_abs = np.abs(coefficients)
-    img.setImage(scalogram_abs, levels=(0, np.max(scalogram_abs)), lut=pg.colormap.get('inferno').getLookupTable())
+    # Calculate the scalograms of all six signals in one call
+    if sample_count >= maxlen:
+        coefficients, frequencies = pywt.cwt(data_buffer, widths, 'morl',
+                                             sampling_period=1 / sampling_rate, axis=-1)
+        for i, scalogram in enumerate(scalograms):
+            scalogram.update(coefficients[:, i])
 
-    # Scale the image to fit the plot area
-    img.setScale(0, 1)
-
-# Timer to repeatedly call update_plot
+# Timer to repeatedly call update_plot at 60 FPS
 timer = pg.QtCore.QTimer()
 timer.timeout.connect(update_plot)
-timer.start(1000 // sampling_rate)
+timer.start(1000 // 60)
 
 # Start Qt event loop
 QtWidgets.QApplication.instance().exec_()
-
@@ -1,14 +1,15 @@
-import serial
+from sample_source import open_source
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy import signal
 from collections import deque
-import time
+from spectral_panel import SpectralPanel
 
 class RealtimeScalogram:
-    def __init__(self, port='/dev/ttyUSB0', baud_rate=115200, buffer_size=500, signal_index=0):
+    def __init__(self, port='/dev/ttyUSB0', baud_rate=115200, buffer_size=500, signal_index=0,
+                 show_spectrum=False, sampling_rate=100):
         # Initialize serial connection
-        self.ser = serial.Serial(port, baud_rate)
+        self.ser = open_source(port, baud_rate)
         self.buffer_size = buffer_size
         self.signal_index = signal_index  # Index of the signal to plot (0-5)
         self.signal_names = ['X-Accel', 'Y-Accel', 'Z-Accel', 'X-Gyro', 'Y-Gyro', 'Z-Gyro']
@@ -22,7 +23,11 @@ class RealtimeScalogram:
         
         # Initialize plot
         plt.ion()  # Enable interactive mode
-        self.fig, (self.ax1, self.ax2) = plt.subplots(2, 1, figsize=(10, 8))
+        if show_spectrum:
+            self.fig, ((self.ax1, self.ax_psd), (self.ax2, self.ax_waterfall)) = plt.subplots(
+                2, 2, figsize=(16, 8))
+        else:
+            self.fig, (self.ax1, self.ax2) = plt.subplots(2, 1, figsize=(10, 8))
         self.fig.tight_layout(pad=3.0)
         
         # Initialize line objects with fixed y-axis limits
@@ -49,7 +54,13 @@ class RealtimeScalogram:
         self.ax2.set_ylabel('Scale')
         # plt.colorbar(self.scalogram_plot, ax=self.ax2)
         
-        self.start_time = time.time()
+        # Optional Welch PSD / STFT waterfall panel next to the scalogram
+        self.spectral_panel = None
+        if show_spectrum:
+            self.spectral_panel = SpectralPanel(self.ax_psd, self.ax_waterfall, sampling_rate,
+                                                self.signal_names, channel=signal_index)
+        
+        self.start_time = self.ser.clock()
 
     def read_sensor_data(self):
         """Read one line of sensor data and return all six values"""
@@ -86,6 +97,8 @@ class RealtimeScalogram:
             # Maintain fixed axis limits
             self.ax1.set_ylim(-38000, 38000)
             self.scalogram_plot.set_clim(vmin=-38000, vmax=38000)
+            if self.spectral_panel is not None:
+                self.spectral_panel.set_channel(index)
 
     def run(self):
         """Main loop for real-time visualization"""
@@ -94,7 +107,7 @@ class RealtimeScalogram:
                 # Read sensor data
                 values = self.read_sensor_data()
                 if values is not None:
-                    current_time = time.time() - self.start_time
+                    current_time = self.ser.clock() - self.start_time
                     
                     # Update all buffers
                     for i, value in enumerate(values):
@@ -113,6 +126,10 @@ class RealtimeScalogram:
                     # Update scalogram
                     self.update_scalogram()
                     
+                    # Update spectrum with the new sample
+                    if self.spectral_panel is not None:
+                        self.spectral_panel.update(values)
+                    
                     # Refresh display
                     self.fig.canvas.draw()
                     self.fig.canvas.flush_events()
@@ -129,6 +146,8 @@ if __name__ == "__main__":
         port='/dev/ttyUSB0',  # Change this to match your Arduino's port
         baud_rate=115200,     # Match this with your Arduino's baud rate
         buffer_size=50,       # Adjust buffer size as needed
-        signal_index=3        # Initial signal to plot (0=ax, 1=ay, 2=az, 3=gx, 4=gy, 5=gz)
+        signal_index=3,       # Initial signal to plot (0=ax, 1=ay, 2=az, 3=gx, 4=gy, 5=gz)
+        show_spectrum=True,   # Show the Welch PSD / STFT waterfall panel
+        sampling_rate=100     # Sampling rate in Hz used for the frequency axes
     )
     visualizer.run()
\ No newline at end of file
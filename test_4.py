@@ -1,14 +1,13 @@
-import serial
+from sample_source import open_source
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy import signal
 from collections import deque
-import time
+from scalogram_compositor import ScalogramCompositor
 
 class MultiAxisScalogram:
     def __init__(self, port='/dev/ttyUSB0', baud_rate=115200, buffer_size=500):
         # Initialize serial connection
-        self.ser = serial.Serial(port, baud_rate)
+        self.ser = open_source(port, baud_rate)
         self.buffer_size = buffer_size
         
         # Create data buffers for all axes
@@ -21,6 +20,7 @@ class MultiAxisScalogram:
         
         # Setup wavelet parameters
         self.widths = np.arange(1, 31)
+        self.compositor = ScalogramCompositor(self.widths, buffer_size, n_channels=3, normalize='max')
         
         # Color maps for each axis
         self.cmaps = {
@@ -74,14 +74,14 @@ class MultiAxisScalogram:
             plt.colorbar(self.scalogram_plots[axis.lower()], ax=ax)
         
         # Initialize combined scalogram plot
-        self.combined_plot = self.ax_combined.imshow(np.zeros((len(self.widths), buffer_size, 3)), 
+        self.combined_plot = self.ax_combined.imshow(self.compositor.rgb, 
                                                    aspect='auto')
         self.ax_combined.set_title('Combined RGB Scalogram')
         self.ax_combined.set_xlabel('Time')
         self.ax_combined.set_ylabel('Scale')
         
         self.fig.tight_layout(pad=2.0)
-        self.start_time = time.time()
+        self.start_time = self.ser.clock()
 
     def read_sensor_data(self):
         """Read one line of sensor data and extract acceleration values"""
@@ -95,23 +95,17 @@ class MultiAxisScalogram:
     def update_scalograms(self):
         """Compute and update all scalograms"""
         if len(self.time_buffer) >= self.buffer_size:
-            # Initialize combined RGB array
-            combined_cwt = np.zeros((len(self.widths), self.buffer_size, 3))
+            # Compute all three CWTs, normalize each by its maximum and pack
+            # the RGB composite, all in the compositor's preallocated buffers
+            self.compositor.load(self.accel_buffers[axis] for axis in ['x', 'y', 'z'])
+            self.compositor.update()
             
-            # Compute CWT for each axis
+            # Update individual scalograms
             for i, axis in enumerate(['x', 'y', 'z']):
-                signal_array = np.array(list(self.accel_buffers[axis]))
-                cwt = signal.cwt(signal_array, signal.ricker, self.widths)
-                cwt_normalized = np.abs(cwt) / np.abs(cwt).max()
-                
-                # Update individual scalogram
-                self.scalogram_plots[axis].set_array(cwt_normalized)
-                
-                # Add to combined RGB scalogram
-                combined_cwt[:, :, i] = cwt_normalized
+                self.scalogram_plots[axis].set_array(self.compositor.normalized[:, :, i])
             
             # Update combined scalogram
-            self.combined_plot.set_array(combined_cwt)
+            self.combined_plot.set_array(self.compositor.rgb)
 
     def run(self):
         """Main loop for real-time visualization"""
@@ -120,7 +114,7 @@ class MultiAxisScalogram:
                 # Read sensor data
                 accel_data = self.read_sensor_data()
                 if accel_data is not None:
-                    current_time = time.time() - self.start_time
+                    current_time = self.ser.clock() - self.start_time
                     
                     # Update buffers
                     self.time_buffer.append(current_time)
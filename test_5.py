@@ -1,14 +1,13 @@
-import serial
+from sample_source import open_source
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy import signal
 from collections import deque
-import time
+from scalogram_compositor import ScalogramCompositor
 
 class RealtimeRGBScalogram:
-    def __init__(self, port='/dev/ttyUSB0', baud_rate=115200, buffer_size=500):
-        # Initialize serial connection
-        self.ser = serial.Serial(port, baud_rate)
+    def __init__(self, port='/dev/ttyUSB0', baud_rate=115200, buffer_size=500, speed=1.0):
+        # Initialize serial connection (or a recording to replay at speed, see sample_source)
+        self.ser = open_source(port, baud_rate, speed=speed)
         self.buffer_size = buffer_size
         self.signal_names = ['X-Accel', 'Y-Accel', 'Z-Accel', 'X-Gyro', 'Y-Gyro', 'Z-Gyro']
         
@@ -18,9 +17,16 @@ class RealtimeRGBScalogram:
         
         # Setup wavelet parameters
         self.widths = np.arange(1, 31)  # Increased scale range for better visualization
+        self.compositor = ScalogramCompositor(self.widths, buffer_size, n_channels=3, normalize='minmax')
         
         # Initialize plot
         plt.ion()  # Enable interactive mode
+        self.build_figure()
+        self.start_time = self.ser.clock()
+
+    def build_figure(self):
+        """Create the figure; export_animation.py renders recordings through it too"""
+        buffer_size = self.buffer_size
         self.fig = plt.figure(figsize=(15, 12))
         self.gs = self.fig.add_gridspec(3, 2, height_ratios=[1, 1, 1])
         
@@ -68,15 +74,13 @@ class RealtimeRGBScalogram:
         
         # Initialize combined RGB scalogram plot
         self.combined_plot = self.ax_combined.imshow(
-            np.zeros((len(self.widths), buffer_size, 3)),
+            self.compositor.rgb,
             aspect='auto',
             extent=[0, buffer_size, 1, len(self.widths)]
         )
         self.ax_combined.set_title('Combined RGB Scalogram')
         self.ax_combined.set_xlabel('Time')
         self.ax_combined.set_ylabel('Scale')
-        
-        self.start_time = time.time()
 
     def read_sensor_data(self):
         """Read one line of sensor data and return the last 3 values"""
@@ -92,23 +96,38 @@ class RealtimeRGBScalogram:
     def update_scalograms(self):
         """Compute and update all scalograms"""
         if len(self.signal_buffers[0]) >= self.buffer_size:
-            # Compute CWT for each signal and update individual plots
-            cwts = []
-            for i in range(3):  # Only X, Y, Z signals
-                signal_array = np.array(list(self.signal_buffers[i]))
-                cwt = np.abs(signal.cwt(signal_array, signal.ricker, self.widths))
-                cwts.append(cwt)
-                self.scalogram_plots[i].set_array(cwt)
+            # Compute CWT magnitudes and the min-max normalized uint8 RGB
+            # composite into the compositor's preallocated buffers
+            self.compositor.load(self.signal_buffers[:3])  # Only X, Y, Z signals
+            self.compositor.update()
             
-            # Create combined RGB image
-            # Normalize each CWT to [0, 1] range for RGB combination
-            rgb_image = np.zeros((len(self.widths), self.buffer_size, 3))
-            for i, cwt in enumerate(cwts):
-                normalized_cwt = (cwt - cwt.min()) / (cwt.max() - cwt.min())
-                rgb_image[:, :, i] = normalized_cwt
+            # Update individual plots
+            for i in range(3):
+                self.scalogram_plots[i].set_array(self.compositor.magnitude[:, :, i])
             
             # Update combined plot
-            self.combined_plot.set_array(rgb_image)
+            self.combined_plot.set_array(self.compositor.rgb)
+
+    def append_sample(self, current_time, values):
+        """Add one sample to the buffers without touching the plots"""
+        for i, value in enumerate(values):
+            self.signal_buffers[i].append(value)
+        self.time_buffer.append(current_time)
+
+    def update_view(self):
+        """Bring the lines, time axis and scalograms up to date with the buffers"""
+        # Update time series plots
+        for i, line in enumerate(self.lines):
+            line.set_data(
+                list(self.time_buffer),
+                list(self.signal_buffers[i])
+            )
+        
+        # Update x-axis limits
+        self.ax_signals.set_xlim(min(self.time_buffer), max(self.time_buffer))
+        
+        # Update scalograms
+        self.update_scalograms()
 
     def run(self):
         """Main loop for real-time visualization"""
@@ -116,25 +135,8 @@ class RealtimeRGBScalogram:
             while True:
                 values = self.read_sensor_data()
                 if values is not None:
-                    current_time = time.time() - self.start_time
-                    
-                    # Update all buffers
-                    for i, value in enumerate(values):
-                        self.signal_buffers[i].append(value)
-                    self.time_buffer.append(current_time)
-                    
-                    # Update time series plots
-                    for i, line in enumerate(self.lines):
-                        line.set_data(
-                            list(self.time_buffer),
-                            list(self.signal_buffers[i])
-                        )
-                    
-                    # Update x-axis limits
-                    self.ax_signals.set_xlim(min(self.time_buffer), max(self.time_buffer))
-                    
-                    # Update scalograms
-                    self.update_scalograms()
+                    self.append_sample(self.ser.clock() - self.start_time, values)
+                    self.update_view()
                     
                     # Refresh display
                     self.fig.canvas.draw()
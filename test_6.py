@@ -1,8 +1,9 @@
-import serial
+from sample_source import open_source
 import time
 import csv
 import datetime
 import numpy as np
+from imu_archive import write_archive
 
 class IMUDataLogger:
     def __init__(self, port='/dev/ttyUSB0', baud_rate=115200, duration=60):
@@ -10,7 +11,8 @@ class IMUDataLogger:
         Initialize the IMU data logger
         
         Args:
-            port (str): Serial port
+            port (str): Serial port, a serial_broker address like 'tcp://127.0.0.1:5760',
+                or a recording to replay (see sample_source.open_source)
             baud_rate (int): Baud rate
             duration (int): Recording duration in seconds
         """
@@ -40,30 +42,31 @@ class IMUDataLogger:
         
         try:
             # Open serial connection
-            self.ser = serial.Serial(self.port, self.baud_rate)
+            self.ser = open_source(self.port, self.baud_rate)
             time.sleep(1)  # Wait for connection to stabilize
             
-            start_time = time.time()
+            # Time comes from the source, so replayed recordings keep their own timestamps
+            start_time = self.ser.clock()
             sample_count = 0
             
             # Collect data until duration is reached
-            while (time.time() - start_time) < self.duration:
+            while (self.ser.clock() - start_time) < self.duration:
                 values = self.read_sensor_data()
                 
                 if values is not None:
-                    current_time = time.time() - start_time
+                    current_time = self.ser.clock() - start_time
                     self.timestamps.append(current_time)
                     self.data.append(values)
                     sample_count += 1
                     
                     # Print progress every second
                     if sample_count % 100 == 0:
-                        elapsed = time.time() - start_time
+                        elapsed = self.ser.clock() - start_time
                         print(f"Time elapsed: {elapsed:.1f}s, Samples: {sample_count}")
             
             # Calculate sampling rate
-            total_time = time.time() - start_time
-            sampling_rate = sample_count / total_time
+            total_time = self.timestamps[-1] if self.timestamps else 0.0
+            sampling_rate = sample_count / total_time if total_time else 0.0
             print(f"\nData collection complete!")
             print(f"Collected {sample_count} samples in {total_time:.1f} seconds")
             print(f"Average sampling rate: {sampling_rate:.1f} Hz")
@@ -102,6 +105,20 @@ class IMUDataLogger:
         stats_filename = f"{folder_path}/imu_stats_{timestamp}.txt"
         self.save_statistics(stats_filename)
     
+    def save_archive(self, folder_path='.', chunk_size=4096):
+        """Save collected data to a compressed, delta-encoded .imuz archive"""
+        if not self.data:
+            print("No data to save!")
+            return
+        
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"{folder_path}/imu_data_{timestamp}.imuz"
+        write_archive(filename, self.timestamps, self.data, self.signal_names,
+                      metadata={'port': self.port, 'baud_rate': self.baud_rate},
+                      chunk_size=chunk_size)
+        print(f"\nData archived to: {filename}")
+        return filename
+    
     def save_statistics(self, filename):
         """Calculate and save basic statistics of the collected data"""
         data_array = np.array(self.data)
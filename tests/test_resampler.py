@@ -0,0 +1,47 @@
+import numpy as np
+from resampler import StreamResampler, resample
+
+PERIOD = 0.0104
+
+
+def make_stream(seed=0, n=3000):
+    """Jittery arrivals of a 1.3 Hz sine with dropped lines and one 2 s gap"""
+    rng = np.random.default_rng(seed)
+    index = np.arange(n, dtype=float)
+    index[n // 2:] += 200
+    index = np.delete(index, rng.choice(n, 30, replace=False))
+    true = 1000 + index * PERIOD
+    arrivals = true + rng.uniform(0, 0.004, len(true))
+    return arrivals, np.sin(2 * np.pi * 1.3 * true)[:, None] * np.ones(6)
+
+
+def expected(grid):
+    # Arrivals are late by 2 ms on average, which both fits keep as an offset
+    return np.sin(2 * np.pi * 1.3 * (grid - 0.002))[:, None]
+
+
+def test_stream_matches_whole_recording_resample():
+    arrivals, values = make_stream()
+    grid, resampled, info = resample(arrivals, values, 100)
+
+    stream = StreamResampler(100)
+    batches = [stream.push(arrivals[i:i + 32], values[i:i + 32]) for i in range(0, len(arrivals), 32)]
+    stream_grid = np.concatenate([batch[0] for batch in batches])
+    stream_values = np.concatenate([batch[1] for batch in batches])
+    gaps = [gap for batch in batches for gap in batch[2]]
+
+    assert gaps == info['gaps']
+    np.testing.assert_allclose(np.diff(stream_grid), 0.01)
+    np.testing.assert_allclose(stream.rate_estimate, 1 / PERIOD, rtol=1e-3)
+    # Away from the start and the gap, where either fit has only a few samples
+    steady = (stream_grid > 1002) & (stream_grid < 1015.5)
+    reference = np.abs(resampled - expected(grid))[(grid > 1002) & (grid < 1015.5)].max()
+    assert np.abs(stream_values - expected(stream_grid))[steady].max() < 1.5 * reference
+
+
+def test_empty_batch():
+    stream = StreamResampler(100)
+    for _ in range(2):
+        grid, resampled, gaps = stream.push(np.empty(0), np.empty((0, 6)))
+        assert grid.shape == (0,) and resampled.shape == (0, 6) and gaps == []
+        stream.push([0.0, 0.01], np.zeros((2, 6)))
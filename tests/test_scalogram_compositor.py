@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from scalogram_compositor import ScalogramCompositor, measure_allocations, ricker
+
+WIDTHS = np.arange(1, 31)
+BUFFER_SIZE = 500
+
+
+def make_compositor(normalize):
+    compositor = ScalogramCompositor(WIDTHS, BUFFER_SIZE, normalize=normalize)
+    compositor.signals[:] = np.random.default_rng(0).standard_normal((BUFFER_SIZE, 3)) * 10000
+    return compositor
+
+
+@pytest.mark.parametrize('normalize', ['minmax', 'max'])
+def test_update_allocates_almost_nothing(normalize):
+    retained, peak = measure_allocations(make_compositor(normalize), frames=50)
+    one_buffer = len(WIDTHS) * BUFFER_SIZE * 3 * 4  # a single float32 scalogram stack
+    assert retained < 1024
+    assert peak < 64 * 1024
+    assert peak < one_buffer / 2
+
+
+def test_magnitude_matches_scipy_cwt():
+    compositor = make_compositor('minmax')
+    compositor.update()
+    for channel in range(3):
+        expected = np.abs(np.array([
+            np.convolve(compositor.signals[:, channel], ricker(min(10 * w, BUFFER_SIZE), w), mode='same')
+            for w in WIDTHS]))
+        np.testing.assert_allclose(compositor.magnitude[:, :, channel], expected, rtol=1e-3, atol=1e-2)
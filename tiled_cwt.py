@@ -0,0 +1,146 @@
+import os
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+import pywt
+from imu_archive import load_recording
+
+
+def scale_support(wavelet, scale, precision=12):
+    """
+    Exact input reach of pywt.cwt at one scale
+
+    pywt.cwt convolves the data with a kernel of L samples, differentiates
+    and trims f = floor((L - 2) / 2) samples from the left, so output i only
+    ever reads data[i - left : i + right + 1] (zero outside the signal).
+    A block that contains that range therefore yields the same terms as the
+    whole recording, and tiles computed this way have no seams.
+
+    Returns:
+        tuple: (left, right) samples of context needed
+    """
+    int_psi, x = pywt.integrate_wavelet(pywt.ContinuousWavelet(wavelet), precision=precision)
+    step = x[1] - x[0]
+    j = (np.arange(scale * (x[-1] - x[0]) + 1) / (scale * step)).astype(int)
+    length = int(np.count_nonzero(j < int_psi.size))
+    trim = (length - 2) // 2
+    return length - 1 - trim, trim + 1
+
+
+def scale_bands(wavelet, scales):
+    """Group scales into octave bands sharing one context size"""
+    order = np.argsort(scales)
+    bands, band = [], []
+    for index in order:
+        if band and scales[index] >= 2 * scales[band[0]]:
+            bands.append(band)
+            band = []
+        band.append(index)
+    bands.append(band)
+    return [(np.array(band), max(max(scale_support(wavelet, scales[i])) for i in band))
+            for band in bands]
+
+
+def _cwt_tile(output_path, rows, start, stop, block, offset, scales, wavelet):
+    coefficients, _ = pywt.cwt(block, scales, wavelet)
+    out = np.load(output_path, mmap_mode='r+')
+    out[rows, start:stop] = np.abs(coefficients[:, offset:offset + stop - start])
+    out.flush()
+
+
+def tiled_cwt(signal, scales, wavelet='morl', output=None, memory_budget=512 * 2**20, workers=4,
+              sampling_period=1.0, dtype=np.float32):
+    """
+    |CWT| of a long signal, computed in overlapping time blocks into a memory-mapped .npy
+
+    Args:
+        signal (np.ndarray): 1-D signal
+        scales (np.ndarray): CWT scales, as for pywt.cwt
+        wavelet (str): Continuous wavelet name
+        output (str): Output .npy path, a temporary file if None
+        memory_budget (int): Approximate bytes of working memory shared by all workers
+        workers (int): Worker processes (1 computes in this process)
+        sampling_period (float): Sampling period for the returned frequencies
+        dtype: Output dtype
+
+    Returns:
+        tuple: (memmap (scales x samples), frequencies)
+    """
+    signal = np.asarray(signal, dtype=np.float64)
+    scales = np.asarray(scales, dtype=np.float64)
+    n = len(signal)
+    if output is None:
+        handle, output = tempfile.mkstemp(suffix='.npy')
+        os.close(handle)
+    result = np.lib.format.open_memmap(output, mode='w+', dtype=dtype, shape=(len(scales), n))
+    del result
+
+    # Each task holds its block plus pywt's float64 output and convolution temporaries
+    per_task = memory_budget / max(workers, 1)
+    tasks = []
+    for rows, context in scale_bands(wavelet, scales):
+        block = int(per_task / (len(rows) * 8 * 3))
+        tile = int(min(n, max(256, block - 2 * context)))
+        for start in range(0, n, tile):
+            stop = min(n, start + tile)
+            lo, hi = max(0, start - context), min(n, stop + context)
+            tasks.append((output, rows, start, stop, signal[lo:hi], start - lo, scales[rows], wavelet))
+
+    if workers <= 1:
+        for task in tasks:
+            _cwt_tile(*task)
+    else:
+        # Keep only a bounded number of blocks in flight
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            for task in tasks:
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                pending.add(pool.submit(_cwt_tile, *task))
+            for future in pending:
+                future.result()
+
+    frequencies = pywt.scale2frequency(wavelet, scales) / sampling_period
+    return np.load(output, mmap_mode='r'), frequencies
+
+
+def verify_seams(signal, scales, wavelet='morl', tile_budget=2**20):
+    """
+    Compare tiled_cwt against an in-memory pywt.cwt of the same signal
+
+    A small memory budget forces many tiles, so every seam is exercised.
+
+    Returns:
+        float: Largest absolute difference (0.0 or float rounding only)
+    """
+    expected = np.abs(pywt.cwt(np.asarray(signal, dtype=np.float64), scales, wavelet)[0])
+    with tempfile.TemporaryDirectory() as folder:
+        tiled, _ = tiled_cwt(signal, scales, wavelet, output=os.path.join(folder, 'cwt.npy'),
+                             memory_budget=tile_budget, workers=1, dtype=np.float64)
+        difference = float(np.max(np.abs(tiled - expected)))
+        del tiled
+    return difference
+
+def main():
+    parser = argparse.ArgumentParser(description="Out-of-core CWT of one channel of a recording")
+    parser.add_argument('path', help="Recording (CSV or .imuz)")
+    parser.add_argument('--channel', default='X-Accel')
+    parser.add_argument('--output', default=None, help="Output .npy, defaults to <recording>_<channel>_cwt.npy")
+    parser.add_argument('--memory', type=float, default=512, help="Memory budget in MiB")
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    timestamps, data, signal_names = load_recording(args.path)
+    signal = data[:, signal_names.index(args.channel)]
+    output = args.output or f"{os.path.splitext(args.path)[0]}_{args.channel}_cwt.npy"
+    scales = np.arange(1, 128, 0.1)
+    sampling_period = float(np.median(np.diff(timestamps)))
+    magnitude, _ = tiled_cwt(signal, scales, 'morl', output, int(args.memory * 2**20), args.workers,
+                             sampling_period)
+    print(f"Wrote {magnitude.shape} magnitudes to {output}")
+
+if __name__ == "__main__":
+    main()